@@ -9,6 +9,15 @@ class HateSpeechClassification:
     confidence: float
     is_hate_speech: bool
 
+@dataclass
+class HateSpeechDetection:
+    """Entidade para o resultado de uma detecção simples"""
+    is_hate_speech: bool
+    fallback_triggered: bool = False
+    verdict_reused: bool = False
+    # Versão das regras usada do início ao fim da detecção (None se trocada no meio)
+    rules_version: Optional[int] = None
+
 @dataclass
 class HateSpeechAnalysis:
     """Entidade principal para análise de hate speech"""
@@ -21,6 +30,8 @@ class HateSpeechAnalysis:
     model_version: str
     fallback_triggered: bool = False
     error_message: Optional[str] = None
+    verdict_reused: bool = False
+    rules_version: Optional[int] = None
 
     def get_primary_classification(self) -> Optional[HateSpeechClassification]:
         """Retorna a classificação com maior confiança"""
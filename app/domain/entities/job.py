@@ -0,0 +1,25 @@
+from dataclasses import dataclass
+from typing import Optional
+from datetime import datetime
+
+class JobStatus:
+    """Estados possíveis de um job assíncrono"""
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+@dataclass
+class Job:
+    """Entidade para um job assíncrono de análise"""
+    id: str
+    kind: str
+    status: str
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+    result: Optional[dict] = None
+    error: Optional[str] = None
+    callback_url: Optional[str] = None
+
+    def is_finished(self) -> bool:
+        return self.status in (JobStatus.COMPLETED, JobStatus.FAILED)
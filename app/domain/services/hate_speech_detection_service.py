@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from app.domain.entities.hate_speech_analysis import HateSpeechAnalysis
+from app.domain.entities.hate_speech_analysis import HateSpeechAnalysis, HateSpeechDetection
 
 class HateSpeechDetectionService(ABC):
     """
@@ -19,6 +19,32 @@ class HateSpeechDetectionService(ABC):
         """
         pass
     
+    def detect(self, text: str) -> HateSpeechDetection:
+        """
+        Detecta discurso de ódio e informa como o veredicto foi obtido
+        
+        Args:
+            text (str): Texto a ser analisado
+            
+        Returns:
+            HateSpeechDetection: Veredicto e metadados (ex: fallback acionado)
+        """
+        return HateSpeechDetection(is_hate_speech=self.detect_hate_speech(text))
+    
+    def rule_signature(self, text: str) -> tuple:
+        """
+        Resultado das camadas de regras (baratas) para o texto
+        
+        Textos com assinaturas diferentes não podem compartilhar veredicto.
+        
+        Args:
+            text (str): Texto a ser analisado
+            
+        Returns:
+            tuple: Achados das regras; vazio se o serviço não usa regras
+        """
+        return ()
+    
     @abstractmethod
     def analyze_text(self, text: str) -> HateSpeechAnalysis:
         """
@@ -32,7 +32,8 @@ class DetectHateSpeechUseCase:
                 }
             
             # Executar detecção
-            is_hate_speech = self.hate_speech_service.detect_hate_speech(text)
+            detection = self.hate_speech_service.detect(text)
+            is_hate_speech = detection.is_hate_speech
             
             logger.info(f"Hate speech detectado: {is_hate_speech} para texto: {text[:50]}...")
             
@@ -40,6 +41,8 @@ class DetectHateSpeechUseCase:
                 "success": True,
                 "is_hate_speech": is_hate_speech,
                 "text_length": len(text),
+                "fallback_triggered": detection.fallback_triggered,
+                "verdict_reused": detection.verdict_reused,
                 "message": "Análise concluída com sucesso"
             }
             
@@ -103,7 +106,8 @@ class AnalyzeHateSpeechUseCase:
                     "analysis_timestamp": analysis.analysis_timestamp.isoformat(),
                     "model_version": analysis.model_version,
                     "fallback_triggered": analysis.fallback_triggered,
-                    "error_message": analysis.error_message
+                    "error_message": analysis.error_message,
+                    "verdict_reused": analysis.verdict_reused
                 }
             }
             
@@ -0,0 +1,105 @@
+"""
+Compara latência (p50/p99) e vazão dos modelos em modo eager e compilado na CPU
+
+Uso:
+    python -m app.infrastructure.benchmark_compiled_models --iterations 200
+
+Sem --corpus, usa frases de exemplo de tamanhos variados. O corpus é um
+arquivo de texto com uma frase por linha. A coluna "recomp." conta os grafos
+compilados durante a medição (após o aquecimento), que deve ser 0; para ver
+o motivo de cada recompilação use TORCH_LOGS=recompiles.
+"""
+from app.infrastructure.compiled_model import compile_pipeline
+from transformers import pipeline
+from torch._dynamo.utils import counters
+import numpy as np
+import argparse
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+MODELS = {
+    "toxic_bert": ("text-classification", "unitary/toxic-bert"),
+    "hate_speech": ("text-classification", "martin-ha/toxic-comment-model"),
+    "zero_shot": ("zero-shot-classification", "facebook/bart-large-mnli")
+}
+
+ZERO_SHOT_LABELS = ["discurso de ódio", "conteúdo tóxico", "conteúdo neutro e respeitoso"]
+
+SAMPLE_TEXTS = [
+    "Bom dia!",
+    "Adorei o filme de ontem, a fotografia é linda.",
+    "Essas pessoas são uma praga e deveriam sumir do país.",
+    "O atendimento foi péssimo, esperei duas horas e ninguém resolveu o meu problema com a entrega.",
+    "Na reunião de condomínio discutimos o orçamento do próximo ano, a reforma da fachada, "
+    "a troca dos portões e a contratação de uma nova empresa de limpeza para as áreas comuns."
+]
+
+
+def load_pipeline(model_name: str, compiled: bool):
+    task, model = MODELS[model_name]
+    model_kwargs = {"attn_implementation": "sdpa"} if compiled else {}
+    pipe = pipeline(task, model=model, device="cpu", model_kwargs=model_kwargs)
+    if compiled:
+        compile_pipeline(pipe)
+    return pipe
+
+
+def run(pipe, model_name: str, texts: list, iterations: int) -> dict:
+    def call(text):
+        if model_name == "zero_shot":
+            return pipe(text, ZERO_SHOT_LABELS)
+        return pipe(text)
+
+    # Aquecimento fora da medição
+    for text in texts:
+        call(text)
+
+    compiled_frames = counters["frames"]["ok"]
+    latencies = []
+    start = time.perf_counter()
+    for i in range(iterations):
+        call_start = time.perf_counter()
+        call(texts[i % len(texts)])
+        latencies.append(time.perf_counter() - call_start)
+    elapsed = time.perf_counter() - start
+    recompiles = counters["frames"]["ok"] - compiled_frames
+
+    latencies = np.array(latencies) * 1000
+    return {
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+        "throughput": iterations / elapsed,
+        "recompiles": recompiles
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark eager x compilado")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--models", nargs="+", choices=list(MODELS), default=list(MODELS))
+    parser.add_argument("--corpus", help="Arquivo com uma frase por linha")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    texts = SAMPLE_TEXTS
+    if args.corpus:
+        with open(args.corpus, encoding="utf-8") as f:
+            texts = [line.strip() for line in f if line.strip()]
+
+    print(f"{'modelo':<12} {'modo':<10} {'p50 (ms)':>10} {'p99 (ms)':>10} {'req/s':>8} {'recomp.':>8}")
+    for model_name in args.models:
+        for mode in ("eager", "compiled"):
+            pipe = load_pipeline(model_name, compiled=mode == "compiled")
+            result = run(pipe, model_name, texts, args.iterations)
+            print(
+                f"{model_name:<12} {mode:<10} {result['p50_ms']:>10.2f} "
+                f"{result['p99_ms']:>10.2f} {result['throughput']:>8.1f} {result['recompiles']:>8}"
+            )
+            del pipe
+
+
+if __name__ == "__main__":
+    main()
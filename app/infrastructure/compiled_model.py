@@ -0,0 +1,89 @@
+from typing import Sequence
+import torch
+import torch.nn.functional as F
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (32, 64, 128, 256, 512)
+
+
+class BucketedCompiledModel(torch.nn.Module):
+    """
+    Wrapper de modelo de classificação compilado com torch.compile
+
+    As entradas são preenchidas (padding à direita, máscara zerada) até o
+    próximo tamanho de bucket, de modo que o grafo compilado só vê formatos
+    fixos e previamente aquecidos e nenhuma requisição dispara recompilação.
+    Sequências maiores que o último bucket usam o modelo eager.
+    """
+
+    def __init__(self, model, pad_token_id: int, buckets: Sequence[int] = DEFAULT_BUCKETS):
+        super().__init__()
+        self.model = model
+        self.pad_token_id = pad_token_id if pad_token_id is not None else 0
+        self.buckets = tuple(sorted(buckets))
+        self.compiled = torch.compile(model, dynamic=False)
+
+    def __getattr__(self, name):
+        # Atributos do modelo original (config, device, dtype...) usados pelo pipeline
+        try:
+            return super().__getattr__(name)
+        except AttributeError:
+            return getattr(super().__getattr__("model"), name)
+
+    def _bucket_for(self, length: int):
+        for bucket in self.buckets:
+            if bucket >= length:
+                return bucket
+        return None
+
+    def forward(self, input_ids, attention_mask=None, token_type_ids=None, **kwargs):
+        bucket = self._bucket_for(input_ids.shape[1])
+        if bucket is None:
+            if token_type_ids is not None:
+                kwargs["token_type_ids"] = token_type_ids
+            return self.model(input_ids=input_ids, attention_mask=attention_mask, **kwargs)
+
+        pad = bucket - input_ids.shape[1]
+        if attention_mask is None:
+            attention_mask = torch.ones_like(input_ids)
+        if pad:
+            input_ids = F.pad(input_ids, (0, pad), value=self.pad_token_id)
+            attention_mask = F.pad(attention_mask, (0, pad), value=0)
+            if token_type_ids is not None:
+                token_type_ids = F.pad(token_type_ids, (0, pad), value=0)
+
+        if token_type_ids is not None:
+            kwargs["token_type_ids"] = token_type_ids
+        return self.compiled(input_ids=input_ids, attention_mask=attention_mask, **kwargs)
+
+    def warmup(self, tokenizer, inference_context=torch.no_grad) -> None:
+        """
+        Compila antecipadamente um grafo por bucket
+
+        O aquecimento roda no mesmo modo de gradiente do pipeline (no_grad);
+        um grafo aquecido sob inference_mode seria recompilado na primeira
+        requisição por causa dos guards de grad mode.
+        """
+        device = next(self.model.parameters()).device
+        for bucket in self.buckets:
+            inputs = tokenizer(
+                "aquecimento " * bucket,
+                truncation=True,
+                max_length=bucket,
+                padding="max_length",
+                return_tensors="pt"
+            )
+            inputs = {key: value.to(device) for key, value in inputs.items()}
+            with inference_context():
+                self(**inputs)
+            logger.info(f"Bucket {bucket} aquecido")
+
+
+def compile_pipeline(pipe, buckets: Sequence[int] = DEFAULT_BUCKETS) -> None:
+    """Substitui o modelo eager do pipeline pela versão compilada e aquecida"""
+    compiled = BucketedCompiledModel(pipe.model, pipe.tokenizer.pad_token_id, buckets)
+    # Mesmo contexto usado pelo pipeline em cada chamada
+    compiled.warmup(pipe.tokenizer, pipe.get_inference_context())
+    pipe.model = compiled
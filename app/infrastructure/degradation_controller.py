@@ -0,0 +1,72 @@
+from app.infrastructure.metrics import metrics
+import threading
+import time
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class DegradationController:
+    """
+    Controlador adaptativo de degradação guiado por um SLO de latência de fila
+
+    Mantém uma média móvel exponencial (EWMA) do tempo de espera na fila
+    das requisições interativas.
+    Quando ela ultrapassa o SLO, o serviço passa a pular a camada zero-shot
+    (bart-large-mnli); a análise completa volta quando a média cai abaixo de
+    `recovery_ratio * slo_seconds`. `min_hold_seconds` evita oscilações.
+    """
+
+    def __init__(
+        self,
+        slo_seconds: float = 1.0,
+        recovery_ratio: float = 0.5,
+        smoothing: float = 0.2,
+        min_hold_seconds: float = 5.0
+    ):
+        self.slo_seconds = slo_seconds
+        self.recovery_ratio = recovery_ratio
+        self.smoothing = smoothing
+        self.min_hold_seconds = min_hold_seconds
+
+        self._lock = threading.Lock()
+        self._latency_ewma = 0.0
+        self._degraded = False
+        self._changed_at = 0.0
+
+    def observe(self, latency_seconds: float) -> None:
+        """Registra uma amostra de latência de fila e atualiza o estado"""
+        with self._lock:
+            self._latency_ewma += self.smoothing * (latency_seconds - self._latency_ewma)
+            metrics.set_gauge("degradation_queue_latency_ewma_seconds", self._latency_ewma)
+
+            now = time.monotonic()
+            if now - self._changed_at < self.min_hold_seconds:
+                return
+
+            if not self._degraded and self._latency_ewma > self.slo_seconds:
+                self._set_degraded(True, now)
+            elif self._degraded and self._latency_ewma < self.slo_seconds * self.recovery_ratio:
+                self._set_degraded(False, now)
+
+    def _set_degraded(self, degraded: bool, now: float) -> None:
+        self._degraded = degraded
+        self._changed_at = now
+        metrics.set_gauge("degradation_active", 1 if degraded else 0)
+        metrics.increment("degradation_transitions_total")
+        if degraded:
+            logger.warning(f"Latência de fila {self._latency_ewma:.3f}s acima do SLO, camada zero-shot desativada")
+        else:
+            logger.info(f"Latência de fila {self._latency_ewma:.3f}s normalizada, análise completa restaurada")
+
+    @property
+    def is_degraded(self) -> bool:
+        with self._lock:
+            return self._degraded
+
+
+# Instância global compartilhada pelos endpoints
+degradation_controller = DegradationController(
+    slo_seconds=float(os.getenv("HATE_SPEECH_LATENCY_SLO_SECONDS", "1.0"))
+)
@@ -0,0 +1,196 @@
+from app.infrastructure.metrics import metrics
+from typing import Sequence, Tuple
+import numpy as np
+import threading
+import zlib
+import re
+import logging
+
+logger = logging.getLogger(__name__)
+
+class HashedNgramPrefilter:
+    """
+    Pré-filtro linear leve treinado a partir dos veredictos do ensemble completo
+
+    Usa n-gramas de caracteres e palavras mapeados por hashing para um vetor
+    esparso e uma regressão logística em NumPy. Em produção roda antes dos
+    modelos transformers e descarta apenas textos com probabilidade de hate
+    speech abaixo de `clean_threshold`, calibrado para uma taxa de perda alvo.
+    """
+
+    def __init__(
+        self,
+        n_features: int = 2 ** 18,
+        char_ngram_range: Tuple[int, int] = (2, 4)
+    ):
+        self.n_features = n_features
+        self.char_ngram_range = char_ngram_range
+        self.weights = np.zeros(n_features, dtype=np.float32)
+        self.bias = 0.0
+        # Sem calibração nenhum texto é desviado
+        self.clean_threshold = 0.0
+        self.target_miss_rate = 0.0
+
+        self._lock = threading.Lock()
+        self._evaluated = 0
+        self._diverted = 0
+
+    @staticmethod
+    def _normalize(text: str) -> str:
+        return re.sub(r"\s+", " ", text.lower()).strip()
+
+    def _featurize(self, text: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Converte o texto em índices e valores (normalizados L2) do vetor esparso"""
+        text = self._normalize(text)
+        tokens = [f"w:{word}" for word in text.split()]
+
+        padded = f" {text} "
+        min_n, max_n = self.char_ngram_range
+        for n in range(min_n, max_n + 1):
+            for i in range(len(padded) - n + 1):
+                tokens.append(f"c:{padded[i:i + n]}")
+
+        if not tokens:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+
+        hashes = np.fromiter(
+            (zlib.crc32(token.encode("utf-8")) for token in tokens),
+            dtype=np.int64,
+            count=len(tokens)
+        )
+        indices, counts = np.unique(hashes % self.n_features, return_counts=True)
+        values = counts.astype(np.float32)
+        values /= np.linalg.norm(values)
+        return indices, values
+
+    def _score(self, indices: np.ndarray, values: np.ndarray) -> float:
+        logit = float(np.dot(self.weights[indices], values)) + self.bias
+        return 1.0 / (1.0 + np.exp(-logit))
+
+    def predict_proba(self, text: str) -> float:
+        """Probabilidade estimada de o ensemble completo marcar o texto como hate speech"""
+        indices, values = self._featurize(text)
+        return self._score(indices, values)
+
+    def fit(
+        self,
+        texts: Sequence[str],
+        labels: Sequence[bool],
+        epochs: int = 5,
+        learning_rate: float = 0.5,
+        l2: float = 1e-6,
+        seed: int = 42
+    ) -> "HashedNgramPrefilter":
+        """
+        Treina a regressão logística com SGD
+
+        Args:
+            texts: Textos do corpus local
+            labels: Veredictos do serviço completo para cada texto
+        """
+        features = [self._featurize(text) for text in texts]
+        targets = np.asarray(labels, dtype=np.float32)
+
+        # Pondera as classes para não favorecer o tráfego benigno majoritário
+        positives = max(float(targets.sum()), 1.0)
+        negatives = max(float(len(targets) - targets.sum()), 1.0)
+        class_weight = {1.0: len(targets) / (2 * positives), 0.0: len(targets) / (2 * negatives)}
+
+        rng = np.random.default_rng(seed)
+        for epoch in range(epochs):
+            lr = learning_rate / (1 + epoch)
+            for i in rng.permutation(len(features)):
+                indices, values = features[i]
+                error = (self._score(indices, values) - targets[i]) * class_weight[float(targets[i])]
+                self.weights[indices] -= lr * (error * values + l2 * self.weights[indices])
+                self.bias -= lr * error
+            logger.info(f"Pré-filtro: época {epoch + 1}/{epochs} concluída")
+
+        return self
+
+    def calibrate(self, texts: Sequence[str], labels: Sequence[bool], target_miss_rate: float = 0.01) -> float:
+        """
+        Escolhe o limiar de desvio para que no máximo `target_miss_rate` dos textos
+        positivos (segundo o ensemble) sejam desviados do ensemble
+
+        Returns:
+            float: Limiar calibrado
+        """
+        if not 0.0 <= target_miss_rate < 1.0:
+            raise ValueError("target_miss_rate deve estar entre 0 e 1")
+
+        positive_scores = np.sort([
+            self.predict_proba(text) for text, label in zip(texts, labels) if label
+        ])
+        self.target_miss_rate = target_miss_rate
+
+        if len(positive_scores) == 0:
+            logger.warning("Pré-filtro: nenhum positivo para calibração, desvio desativado")
+            self.clean_threshold = 0.0
+            return self.clean_threshold
+
+        # Textos com score estritamente abaixo do limiar são desviados
+        allowed_misses = int(np.floor(target_miss_rate * len(positive_scores)))
+        self.clean_threshold = float(positive_scores[allowed_misses])
+        logger.info(f"Pré-filtro calibrado: limiar={self.clean_threshold:.4f}, taxa de perda alvo={target_miss_rate}")
+        return self.clean_threshold
+
+    def evaluate(self, texts: Sequence[str], labels: Sequence[bool]) -> dict:
+        """Mede a taxa de perda e a fração desviada em um conjunto rotulado"""
+        scores = np.array([self.predict_proba(text) for text in texts])
+        targets = np.asarray(labels, dtype=bool)
+        diverted = scores < self.clean_threshold
+        positives = int(targets.sum())
+        return {
+            "samples": len(targets),
+            "diverted_fraction": float(diverted.mean()) if len(targets) else 0.0,
+            "miss_rate": float((diverted & targets).sum() / positives) if positives else 0.0
+        }
+
+    def is_confidently_clean(self, text: str) -> bool:
+        """Indica se o texto pode pular o ensemble de transformers"""
+        clean = self.predict_proba(text) < self.clean_threshold
+
+        with self._lock:
+            self._evaluated += 1
+            if clean:
+                self._diverted += 1
+            diverted_fraction = self._diverted / self._evaluated
+
+        metrics.increment("prefilter_evaluated_total")
+        if clean:
+            metrics.increment("prefilter_diverted_total")
+        metrics.set_gauge("prefilter_diverted_fraction", diverted_fraction)
+        return clean
+
+    @property
+    def diverted_fraction(self) -> float:
+        """Fração do tráfego desviada desde o carregamento"""
+        with self._lock:
+            return self._diverted / self._evaluated if self._evaluated else 0.0
+
+    def save(self, path: str) -> None:
+        """Salva o modelo em um arquivo .npz"""
+        np.savez_compressed(
+            path,
+            weights=self.weights,
+            bias=np.float32(self.bias),
+            clean_threshold=np.float32(self.clean_threshold),
+            target_miss_rate=np.float32(self.target_miss_rate),
+            char_ngram_range=np.array(self.char_ngram_range)
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "HashedNgramPrefilter":
+        """Carrega um modelo salvo com `save`"""
+        data = np.load(path)
+        prefilter = cls(
+            n_features=len(data["weights"]),
+            char_ngram_range=tuple(int(n) for n in data["char_ngram_range"])
+        )
+        prefilter.weights = data["weights"].astype(np.float32)
+        prefilter.bias = float(data["bias"])
+        prefilter.clean_threshold = float(data["clean_threshold"])
+        prefilter.target_miss_rate = float(data["target_miss_rate"])
+        logger.info(f"Pré-filtro carregado de {path} (limiar={prefilter.clean_threshold:.4f})")
+        return prefilter
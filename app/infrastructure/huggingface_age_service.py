@@ -2,17 +2,21 @@
 # implementação siga o contrato definido para serviços de classificação etária.
 from app.domain.services.age_classification_service import AgeClassificationService
 
-# Importa o pipeline da biblioteca Hugging Face Transformers, que facilita o uso
-# de modelos pré-treinados para diversas tarefas de NLP (Processamento de Linguagem Natural).
-from transformers import pipeline
+# Importa o gerenciador de modelos, que cria os pipelines da biblioteca Hugging Face Transformers
+# (modelos pré-treinados para tarefas de NLP) e os mantém dentro de um orçamento de memória.
+from app.infrastructure.model_manager import ModelManager, model_manager as default_model_manager
 
 # Importa PyTorch, uma das principais bibliotecas de machine learning, utilizada
 # para treinar e executar modelos de deep learning de forma eficiente.
 import torch
 
+# Arquivo de regras versionado (labels e mapeamento de idades) recarregado em tempo real.
+from app.infrastructure.rules_config import RulesStore, rules_store as default_rules_store
+from typing import Optional
+
 
 class HuggingFaceAgeService(AgeClassificationService):
-    def __init__(self):
+    def __init__(self, rules_store: Optional[RulesStore] = None, model_manager: Optional[ModelManager] = None):
         """
         Inicializa o serviço de classificação etária usando um modelo pré-treinado da Hugging Face.
         
@@ -33,34 +37,23 @@ class HuggingFaceAgeService(AgeClassificationService):
           no conhecimento aprendido durante seu treinamento geral.
         
         - device="mps": usa a GPU integrada dos Macs com Apple Silicon para acelerar o processamento.
+        
+        - ModelManager: o pipeline é registrado uma única vez e compartilhado entre as instâncias
+          deste serviço. Se ficar ocioso ou o orçamento de memória for excedido, ele é descartado
+          e recarregado depois a partir de pesos locais mapeados em memória (mmap).
         """
-        self.classifier = pipeline(
-            "zero-shot-classification",
+        self.classifier = (model_manager or default_model_manager).register(
+            name="age_zero_shot",
+            task="zero-shot-classification",
             model="facebook/bart-large-mnli",  # Modelo para zero-shot classification
             device="mps"  # Usa Metal Performance Shaders para aceleração no Apple Mac
         )
+        self.classifier.load()
         
-        # Labels que representam categorias de conteúdo para avaliar a faixa etária recomendada.
-        self.age_labels = [
-            "conteúdo adequado para todas as idades",
-            "conteúdo infantil e educativo",
-            "conteúdo com violência leve ou aventura",
-            "conteúdo com conflitos e suspense",
-            "conteúdo com violência moderada",
-            "conteúdo com violência intensa ou temas adultos",
-            "conteúdo extremamente violento ou perturbador"
-        ]
-        
-        # Mapeamento das labels para uma idade mínima recomendada.
-        self.label_to_age = {
-            "conteúdo adequado para todas as idades": 0,
-            "conteúdo infantil e educativo": 0,
-            "conteúdo com violência leve ou aventura": 10,
-            "conteúdo com conflitos e suspense": 12,
-            "conteúdo com violência moderada": 14,
-            "conteúdo com violência intensa ou temas adultos": 16,
-            "conteúdo extremamente violento ou perturbador": 18
-        }
+        # Labels que representam categorias de conteúdo e o mapeamento para a idade mínima
+        # recomendada vêm do arquivo de regras versionado (config/rules.json, campo "age_labels"),
+        # recarregado em tempo real sem precisar recarregar o modelo.
+        self.rules_store = rules_store or default_rules_store
     
     def classify(self, text: str) -> int:
         """
@@ -75,14 +68,18 @@ class HuggingFaceAgeService(AgeClassificationService):
         A classificação é baseada na label com maior score (confiança) dada pelo modelo.
         Ajusta a idade recomendada dependendo da confiança para evitar falsos positivos.
         """
+        # Snapshot das regras atuais: labels e idades da mesma versão durante toda a classificação
+        label_to_age = self.rules_store.current.age_labels
+        age_labels = list(label_to_age)
+        
         try:
             # Executa a classificaçãousando o modelo pré-treinado do Hugging Face.
             # O modelo avalia o texto fornecido e calcula a probabilidade de ele
-            # se enquadrar em cada uma das categorias (labels) definidas em self.age_labels,
+            # se enquadrar em cada uma das categorias (labels) definidas em age_labels,
             # mesmo sem ter sido treinado especificamente para essa tarefa.
             # Essa abordagem permite classificar o texto em múltiplas categorias,
             # retornando a confiança para cada uma delas.
-            result = self.classifier(text, self.age_labels)
+            result = self.classifier(text, age_labels)
             
             # Obtém a label com maior confiança, ou seja, a categoria que o modelo considera mais provável para o texto.
             top_label = result['labels'][0]
@@ -98,7 +95,7 @@ class HuggingFaceAgeService(AgeClassificationService):
             # Converte a label principal (categoria mais provável) para a idade mínima recomendada correspondente,
             # usando o dicionário de mapeamento label_to_age.
             # Caso a label não esteja no dicionário, utiliza o valor padrão 10 como faixa etária segura.
-            age = self.label_to_age.get(top_label, 10)
+            age = label_to_age.get(top_label, 10)
 
             # Ajusta a idade para mais conservador se a confiança for baixa
             if confidence < 0.3:
@@ -1,8 +1,18 @@
 from app.domain.services.hate_speech_detection_service import HateSpeechDetectionService
-from app.domain.entities.hate_speech_analysis import HateSpeechAnalysis, HateSpeechClassification
-from transformers import pipeline
+from app.domain.entities.hate_speech_analysis import HateSpeechAnalysis, HateSpeechClassification, HateSpeechDetection
+from app.infrastructure.hashed_ngram_prefilter import HashedNgramPrefilter
+from app.infrastructure.degradation_controller import DegradationController
+from app.infrastructure.metrics import metrics
+from app.infrastructure.compiled_model import compile_pipeline
+from app.infrastructure.rules_config import RuleMatcher, RulesConfig, RulesStore, rules_store as default_rules_store
+from app.infrastructure.model_manager import ModelManager, model_manager as default_model_manager
+from app.infrastructure.priority_scheduler import PriorityScheduler
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
+from typing import Optional
+import threading
 import torch
+import os
 import logging
 
 logger = logging.getLogger(__name__)
@@ -14,25 +24,50 @@ class HuggingFaceHateSpeechService(HateSpeechDetectionService):
     
     MODEL_VERSION = "1.1.0"
     
-    def __init__(self):
-        self._initialize_models()
-        self._setup_configuration()
+    def __init__(
+        self,
+        prefilter_path: Optional[str] = None,
+        degradation_controller: Optional[DegradationController] = None,
+        concurrent_ensemble: bool = False,
+        ensemble_torch_threads: Optional[int] = None,
+        scheduler: Optional[PriorityScheduler] = None,
+        compiled_models: bool = False,
+        rules_store: Optional[RulesStore] = None,
+        model_manager: Optional[ModelManager] = None
+    ):
+        self.degradation_controller = degradation_controller
+        self.model_manager = model_manager or default_model_manager
+        self._initialize_models(compiled_models)
+        self._setup_configuration(rules_store or default_rules_store)
+        self._initialize_prefilter(prefilter_path)
+        self.scheduler = scheduler
+        self._initialize_ensemble_executor(
+            concurrent_ensemble, ensemble_torch_threads, scheduler.workers if scheduler else 1
+        )
     
-    def _initialize_models(self):
+    def _initialize_models(self, compiled: bool = False):
         """Inicializa os modelos de ML"""
         try:
             device = "mps" if torch.backends.mps.is_available() else "cpu"
+            # Modo compilado usa atenção SDPA (scaled dot product attention)
+            model_kwargs = {"attn_implementation": "sdpa"} if compiled else {}
+            post_load = self._compile_model if compiled else None
             
             # Múltiplos modelos para melhor detecção
+            # Os pipelines ficam sob o ModelManager, que pode descartá-los e recarregá-los sob demanda
             self.models = {}
             
             # Modelo 1: BERT para toxicidade (mais sensível)
             try:
-                self.models['toxic_bert'] = pipeline(
-                    "text-classification",
+                self.models['toxic_bert'] = self.model_manager.register(
+                    name='toxic_bert',
+                    task="text-classification",
                     model="unitary/toxic-bert",
-                    device=device
+                    device=device,
+                    model_kwargs=model_kwargs,
+                    post_load=post_load
                 )
+                self.models['toxic_bert'].load()
                 logger.info("Toxic BERT carregado com sucesso")
             except Exception as e:
                 logger.warning(f"Erro ao carregar Toxic BERT: {e}")
@@ -40,11 +75,15 @@ class HuggingFaceHateSpeechService(HateSpeechDetectionService):
             
             # Modelo 2: Modelo alternativo para hate speech
             try:
-                self.models['hate_speech'] = pipeline(
-                    "text-classification", 
+                self.models['hate_speech'] = self.model_manager.register(
+                    name='hate_speech',
+                    task="text-classification",
                     model="martin-ha/toxic-comment-model",
-                    device=device
+                    device=device,
+                    model_kwargs=model_kwargs,
+                    post_load=post_load
                 )
+                self.models['hate_speech'].load()
                 logger.info("Hate Speech model carregado com sucesso")
             except Exception as e:
                 logger.warning(f"Erro ao carregar hate speech model: {e}")
@@ -52,11 +91,15 @@ class HuggingFaceHateSpeechService(HateSpeechDetectionService):
             
             # Modelo 3: Zero-shot para análise contextual
             try:
-                self.models['zero_shot'] = pipeline(
-                    "zero-shot-classification",
+                self.models['zero_shot'] = self.model_manager.register(
+                    name='zero_shot',
+                    task="zero-shot-classification",
                     model="facebook/bart-large-mnli",
-                    device=device
+                    device=device,
+                    model_kwargs=model_kwargs,
+                    post_load=post_load
                 )
+                self.models['zero_shot'].load()
                 logger.info("Zero-shot model carregado com sucesso")
             except Exception as e:
                 logger.warning(f"Erro ao carregar zero-shot: {e}")
@@ -68,73 +111,108 @@ class HuggingFaceHateSpeechService(HateSpeechDetectionService):
             logger.error(f"Erro geral ao inicializar modelos: {e}")
             raise
     
-    def _setup_configuration(self):
-        """Configura labels e thresholds com valores mais sensíveis"""
-        
-        # Labels em português mais específicos
-        self.hate_speech_labels = [
-            "discurso de ódio extremo e violento",
-            "incitação à violência e eliminação",
-            "desumanização e comparação com pragas",
-            "linguagem discriminatória severa",
-            "ameaças e intimidação",
-            "bullying e assédio grave",
-            "conteúdo tóxico moderado",
-            "linguagem ofensiva leve",
-            "crítica construtiva",
-            "conteúdo neutro e respeitoso"
-        ]
-        
-        # Thresholds mais baixos para maior sensibilidade
-        self.hate_threshold = 0.4  # Reduzido de 0.65
-        self.toxic_threshold = 0.5  # Reduzido de 0.7
-        
-        # Indicadores de hate speech
-        self.hate_indicators = [
-            "discurso de ódio extremo e violento",
-            "incitação à violência e eliminação", 
-            "desumanização e comparação com pragas",
-            "linguagem discriminatória severa",
-            "ameaças e intimidação",
-            "bullying e assédio grave",
-            "conteúdo tóxico moderado"
-        ]
-        
-        # Palavras-chave expandidas e mais específicas
-        self.hate_keywords = [
-            # Violência e eliminação
-            "eliminar", "eliminadas", "eliminados", "exterminar", "extermínio",
-            "matar", "morrer", "morte", "assassinar", "acabar com",
-            
-            # Desumanização
-            "praga", "pragas", "parasita", "parasitas", "lixo", "escória",
-            "verme", "vermes", "animal", "animais", "coisa", "coisas",
-            
-            # Ódio e discriminação
-            "ódio", "odio", "nojo", "repugnante", "asqueroso", "nojento",
-            "inferior", "inferiores", "superiores", "raça", "espécie",
-            
-            # Violência direta
-            "violência", "agressão", "atacar", "destruir", "aniquilar",
-            "sumir", "desaparecer", "banir", "expulsar"
-        ]
+    def _compile_model(self, pipe):
+        """Compila o modelo com torch.compile e aquece os buckets de padding (a cada carga)"""
+        model_name = pipe.model.config.name_or_path
+        try:
+            compile_pipeline(pipe)
+            logger.info(f"Modelo {model_name} compilado")
+        except Exception as e:
+            logger.warning(f"Erro ao compilar {model_name}, usando modo eager: {e}")
+    
+    def _initialize_prefilter(self, prefilter_path: Optional[str]):
+        """Carrega o pré-filtro leve treinado com train_prefilter, se configurado"""
+        self.prefilter = None
+        if not prefilter_path:
+            return
+        try:
+            self.prefilter = HashedNgramPrefilter.load(prefilter_path)
+        except Exception as e:
+            logger.warning(f"Erro ao carregar pré-filtro, usando ensemble completo: {e}")
+    
+    def _initialize_ensemble_executor(
+        self,
+        concurrent_ensemble: bool,
+        torch_threads: Optional[int],
+        concurrent_requests: int = 1
+    ):
+        """
+        Prepara o modo de ensemble concorrente (um thread por modelo e por requisição simultânea)
+
+        `concurrent_requests` é o número de requisições que podem chegar ao
+        serviço ao mesmo tempo (os workers do escalonador); o pool tem uma vaga
+        por modelo para cada uma, para que uma requisição não espere pelos
+        modelos de outra.
+        """
+        self._ensemble_executor = None
+        if not concurrent_ensemble:
+            return
         
-        # Padrões perigosos (frases completas)
-        self.dangerous_patterns = [
-            "deveriam ser eliminad",
-            "são uma praga",
-            "não merecem viver",
-            "mundo seria melhor sem",
-            "deveria morrer", 
-            "não são humanos",
-            "raça inferior",
-            "merecem sofrer"
-        ]
+        active_models = max(1, sum(1 for model in self.models.values() if model is not None))
+        slots = active_models * max(1, concurrent_requests)
+        # O pool intra-op do torch é global ao processo: divide os núcleos entre todas as
+        # inferências que podem rodar ao mesmo tempo para não haver oversubscription
+        # (o limite vale também para idade e para a passada zero-shot do analyze)
+        threads = torch_threads or max(1, (os.cpu_count() or 1) // slots)
+        torch.set_num_threads(threads)
+        self._ensemble_executor = ThreadPoolExecutor(
+            max_workers=slots,
+            thread_name_prefix="ensemble"
+        )
+        logger.info(
+            f"Ensemble concorrente: {active_models} modelos x {concurrent_requests} requisições, "
+            f"{threads} threads torch cada"
+        )
+    
+    def _setup_configuration(self, rules_store: RulesStore):
+        """
+        Carrega labels, palavras-chave, padrões e thresholds do arquivo de regras
+        versionado (config/rules.json) e acompanha as atualizações em tempo real
+        """
+        self._apply_rules(rules_store.current)
+        rules_store.subscribe(lambda old, new: self._apply_rules(new))
+    
+    def _apply_rules(self, rules: RulesConfig):
+        """Recompila o matcher e troca as regras atomicamente (uma única atribuição)"""
+        self.rules = RuleMatcher(rules)
+        logger.info(f"Regras versão {rules.version} aplicadas")
     
     def detect_hate_speech(self, text: str) -> bool:
         """
         Detecção melhorada com múltiplas camadas
         """
+        return self.detect(text).is_hate_speech
+    
+    def detect(self, text: str) -> HateSpeechDetection:
+        """Detecção que marca como fallback os resultados obtidos em modo degradado"""
+        matcher = self.rules
+        degraded = self._is_degraded()
+        is_hate_speech = self._run_detection_layers(text, degraded)
+        return HateSpeechDetection(
+            is_hate_speech=is_hate_speech,
+            fallback_triggered=degraded,
+            rules_version=self._rules_version_since(matcher)
+        )
+    
+    def _rules_version_since(self, matcher: RuleMatcher) -> Optional[int]:
+        """Versão das regras usada do início ao fim, ou None se foram trocadas no meio"""
+        return matcher.config.version if self.rules is matcher else None
+    
+    def rule_signature(self, text: str) -> tuple:
+        """Padrão, palavra-chave e contexto violento encontrados (camadas 1 e 2)"""
+        text_lower = text.lower()
+        return (
+            self._detect_dangerous_patterns(text_lower),
+            self._detect_keywords(text_lower),
+            self._has_violent_context(text_lower)
+        )
+    
+    def _is_degraded(self) -> bool:
+        """Indica se a latência de fila está acima do SLO"""
+        return self.degradation_controller is not None and self.degradation_controller.is_degraded
+    
+    def _run_detection_layers(self, text: str, degraded: bool) -> bool:
+        """Executa as camadas de detecção; degradado, pula a camada zero-shot"""
         if not text or not text.strip():
             return False
             
@@ -156,7 +234,7 @@ class HuggingFaceHateSpeechService(HateSpeechDetectionService):
                 return True
         
         # Camada 3: Modelos de ML
-        ml_detected = self._detect_with_ml_models(text)
+        ml_detected = self._detect_with_ml_models(text, include_zero_shot=not degraded)
         if ml_detected:
             logger.warning("HATE SPEECH DETECTADO POR ML")
             return True
@@ -166,17 +244,11 @@ class HuggingFaceHateSpeechService(HateSpeechDetectionService):
     
     def _detect_dangerous_patterns(self, text: str) -> str:
         """Detecta padrões específicos perigosos"""
-        for pattern in self.dangerous_patterns:
-            if pattern in text:
-                return pattern
-        return None
+        return self.rules.find_pattern(text)
     
     def _detect_keywords(self, text: str) -> str:
         """Detecta palavras-chave"""
-        for keyword in self.hate_keywords:
-            if keyword in text:
-                return keyword
-        return None
+        return self.rules.find_keyword(text)
     
     def _has_violent_context(self, text: str) -> bool:
         """Verifica se há contexto violento"""
@@ -184,30 +256,82 @@ class HuggingFaceHateSpeechService(HateSpeechDetectionService):
         count = sum(1 for word in violent_words if word in text)
         return count >= 2  # Se tem 2+ palavras violentas, é contexto violento
     
-    def _detect_with_ml_models(self, text: str) -> bool:
+    def _detect_with_ml_models(self, text: str, include_zero_shot: bool = True) -> bool:
         """Detecção usando modelos de ML"""
-        detections = []
+        # Primeiro estágio: pré-filtro leve desvia textos claramente benignos
+        if self.prefilter is not None and self.prefilter.is_confidently_clean(text):
+            logger.info(f"Pré-filtro: texto benigno, ensemble ignorado (desvio: {self.prefilter.diverted_fraction:.1%})")
+            return False
         
-        # Teste cada modelo disponível
+        active_models = []
         for model_name, model in self.models.items():
             if model is None:
                 continue
-                
-            try:
-                if model_name == 'zero_shot':
-                    detected = self._detect_with_zero_shot(text, model)
-                else:
-                    detected = self._detect_with_classifier(text, model, model_name)
-                
-                detections.append(detected)
-                logger.info(f"Modelo {model_name}: {detected}")
-                
-            except Exception as e:
-                logger.error(f"Erro no modelo {model_name}: {e}")
+            if model_name == 'zero_shot' and not include_zero_shot:
+                logger.info("Modo degradado: zero-shot ignorado")
+                continue
+            active_models.append((model_name, model))
+        
+        if self._ensemble_executor is not None:
+            return self._detect_concurrently(text, active_models)
+        
+        # Teste cada modelo disponível
+        detections = [self._run_model(text, model_name, model) for model_name, model in active_models]
         
         # Se qualquer modelo detectou, considera hate speech
         return any(detections)
     
+    def _detect_concurrently(self, text: str, active_models: list) -> bool:
+        """
+        Executa os modelos em paralelo e retorna no primeiro positivo
+
+        Modelos que ainda não começaram são pulados; os que já estão rodando
+        não podem ser interrompidos e vão até o fim, só com o resultado ignorado.
+        Esse trabalho abandonado é cobrado do worker do escalonador, que só
+        pega a próxima requisição quando ele termina.
+        """
+        decided = threading.Event()
+        futures = {
+            self._ensemble_executor.submit(self._run_model_unless_decided, decided, text, model_name, model): model_name
+            for model_name, model in active_models
+        }
+        try:
+            for future in as_completed(futures):
+                if future.result():
+                    logger.info(f"Modelo {futures[future]} detectou, demais modelos ignorados")
+                    metrics.increment("ensemble_short_circuit_total")
+                    return True
+            return False
+        finally:
+            decided.set()
+            abandoned = [future for future in futures if not future.cancel() and not future.done()]
+            if abandoned:
+                metrics.increment("ensemble_abandoned_models_total", len(abandoned))
+                if self.scheduler is not None:
+                    self.scheduler.hold_worker(abandoned)
+    
+    def _run_model_unless_decided(self, decided: threading.Event, text: str, model_name: str, model) -> bool:
+        """Executa o modelo, a menos que a requisição já tenha sido decidida"""
+        if decided.is_set():
+            metrics.increment("ensemble_skipped_models_total")
+            return False
+        return self._run_model(text, model_name, model)
+    
+    def _run_model(self, text: str, model_name: str, model) -> bool:
+        """Executa um modelo do ensemble"""
+        try:
+            if model_name == 'zero_shot':
+                detected = self._detect_with_zero_shot(text, model)
+            else:
+                detected = self._detect_with_classifier(text, model, model_name)
+            
+            logger.info(f"Modelo {model_name}: {detected}")
+            return detected
+            
+        except Exception as e:
+            logger.error(f"Erro no modelo {model_name}: {e}")
+            return False
+    
     def _detect_with_classifier(self, text: str, model, model_name: str) -> bool:
         """Detecção com modelos de classificação"""
         try:
@@ -223,8 +347,8 @@ class HuggingFaceHateSpeechService(HateSpeechDetectionService):
             # Labels que indicam toxicidade/hate speech
             toxic_labels = ['TOXIC', 'HATE', 'OFFENSIVE', '1', 'POSITIVE', 'LABEL_1']
             
-            # Threshold mais baixo para maior sensibilidade
-            threshold = 0.3 if model_name == 'toxic_bert' else 0.5
+            # Threshold por modelo definido no arquivo de regras
+            threshold = self.rules.config.classifier_thresholds.get(model_name, 0.5)
             
             return label in toxic_labels and score > threshold
             
@@ -234,8 +358,10 @@ class HuggingFaceHateSpeechService(HateSpeechDetectionService):
     
     def _detect_with_zero_shot(self, text: str, model) -> bool:
         """Detecção com zero-shot"""
+        # Snapshot das regras: labels, indicadores e threshold da mesma versão
+        rules = self.rules.config
         try:
-            result = model(text, self.hate_speech_labels)
+            result = model(text, list(rules.hate_speech_labels))
             
             top_label = result['labels'][0]
             confidence = result['scores'][0]
@@ -243,7 +369,7 @@ class HuggingFaceHateSpeechService(HateSpeechDetectionService):
             logger.info(f"Zero-shot - Top: {top_label}, Score: {confidence}")
             
             # Verifica se é categoria de hate speech com threshold baixo
-            is_hate = top_label in self.hate_indicators and confidence > self.hate_threshold
+            is_hate = top_label in rules.hate_indicators and confidence > rules.hate_threshold
             
             # Log das top 3 classificações
             for i in range(min(3, len(result['labels']))):
@@ -262,7 +388,12 @@ class HuggingFaceHateSpeechService(HateSpeechDetectionService):
         classifications = []
         detected_categories = []
         confidence_score = 0.0
-        fallback_triggered = False
+        matcher = self.rules
+        rules = matcher.config
+        
+        # Sob pressão de latência a passada zero-shot é pulada e o resultado marcado como fallback
+        degraded = self._is_degraded()
+        fallback_triggered = degraded
         error_message = None
         
         # Análise de padrões
@@ -279,20 +410,20 @@ class HuggingFaceHateSpeechService(HateSpeechDetectionService):
         
         # Análise com modelos ML
         try:
-            if self.models['zero_shot']:
-                result = self.models['zero_shot'](text, self.hate_speech_labels)
+            if self.models['zero_shot'] and not degraded:
+                result = self.models['zero_shot'](text, list(rules.hate_speech_labels))
                 
                 for label, score in zip(result['labels'], result['scores']):
-                    is_hate = label in self.hate_indicators
+                    is_hate = label in rules.hate_indicators
                     classifications.append(
                         HateSpeechClassification(
                             category=label,
                             confidence=score,
-                            is_hate_speech=is_hate and score > self.hate_threshold
+                            is_hate_speech=is_hate and score > rules.hate_threshold
                         )
                     )
                     
-                    if is_hate and score > self.hate_threshold:
+                    if is_hate and score > rules.hate_threshold:
                         detected_categories.append(f"ML: {label}")
                         confidence_score = max(confidence_score, score)
                         
@@ -302,7 +433,7 @@ class HuggingFaceHateSpeechService(HateSpeechDetectionService):
             error_message = str(e)
         
         # Decisão final
-        is_hate_speech = self.detect_hate_speech(text)
+        is_hate_speech = self._run_detection_layers(text, degraded)
         
         return HateSpeechAnalysis(
             text=text,
@@ -313,5 +444,6 @@ class HuggingFaceHateSpeechService(HateSpeechDetectionService):
             analysis_timestamp=datetime.now(),
             model_version=self.MODEL_VERSION,
             fallback_triggered=fallback_triggered,
-            error_message=error_message
+            error_message=error_message,
+            rules_version=self._rules_version_since(matcher)
         )
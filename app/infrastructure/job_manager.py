@@ -0,0 +1,145 @@
+from app.domain.entities.job import Job, JobStatus
+from app.infrastructure.priority_scheduler import Priority, PriorityScheduler
+from app.infrastructure.metrics import metrics
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Optional
+from urllib.parse import urlparse
+import urllib.request
+import threading
+import json
+import uuid
+import logging
+
+logger = logging.getLogger(__name__)
+
+LOCAL_CALLBACK_HOSTS = ("localhost", "127.0.0.1", "::1")
+CALLBACK_SCHEMES = ("http", "https")
+
+
+class _NoRedirectHandler(urllib.request.HTTPRedirectHandler):
+    """Recusa redirecionamentos: um endpoint local não pode repassar o callback a outro host"""
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+# Só HTTP(S), sem seguir redirecionamentos (3xx vira HTTPError)
+_callback_opener = urllib.request.build_opener(_NoRedirectHandler)
+
+
+class JobLimitExceeded(Exception):
+    """Todos os jobs retidos ainda estão em andamento"""
+    pass
+
+
+class JobManager:
+    """
+    Gerencia jobs assíncronos executados pelo escalonador de prioridade
+
+    Os jobs finalizados ficam disponíveis para consulta até serem descartados
+    pelo limite `max_jobs` (os finalizados mais antigos saem primeiro). Jobs
+    em andamento nunca são descartados; se o limite estiver ocupado só por
+    eles, novas submissões são recusadas.
+    """
+
+    def __init__(self, scheduler: PriorityScheduler, max_jobs: int = 1000):
+        self.scheduler = scheduler
+        self.max_jobs = max_jobs
+        self._lock = threading.Lock()
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        # Callbacks saem de threads próprios para não ocupar os workers de inferência
+        self._callback_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="job-callback")
+
+    def submit(
+        self,
+        kind: str,
+        fn: Callable[[], dict],
+        priority: Priority = Priority.BULK,
+        callback_url: Optional[str] = None
+    ) -> Job:
+        """
+        Enfileira um job e retorna imediatamente
+
+        Raises:
+            ValueError: Se o callback não for uma URL http(s) de um host local
+            JobLimitExceeded: Se todos os jobs retidos ainda estiverem em andamento
+        """
+        if callback_url:
+            parsed = urlparse(callback_url)
+            if parsed.scheme not in CALLBACK_SCHEMES:
+                raise ValueError("callback_url deve usar http ou https")
+            if parsed.hostname not in LOCAL_CALLBACK_HOSTS:
+                raise ValueError("callback_url deve apontar para um host local")
+
+        job = Job(
+            id=uuid.uuid4().hex,
+            kind=kind,
+            status=JobStatus.QUEUED,
+            created_at=datetime.now(),
+            callback_url=callback_url
+        )
+        with self._lock:
+            if len(self._jobs) >= self.max_jobs and not self._evict_finished():
+                metrics.increment("jobs_rejected_total")
+                raise JobLimitExceeded(f"Limite de {self.max_jobs} jobs em andamento atingido")
+            self._jobs[job.id] = job
+
+        metrics.increment(f"jobs_{kind}_submitted_total")
+        self.scheduler.submit(self._run, job, fn, priority=priority)
+        return job
+
+    def _evict_finished(self) -> bool:
+        """Remove o job finalizado mais antigo (chamado com o lock adquirido)"""
+        for job_id, job in self._jobs.items():
+            if job.is_finished():
+                del self._jobs[job_id]
+                return True
+        return False
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _run(self, job: Job, fn: Callable[[], dict]) -> None:
+        job.status = JobStatus.RUNNING
+        try:
+            job.result = fn()
+            job.status = JobStatus.COMPLETED
+        except Exception as e:
+            logger.error(f"Erro no job {job.id}: {e}")
+            job.error = str(e)
+            job.status = JobStatus.FAILED
+        job.finished_at = datetime.now()
+        metrics.increment(f"jobs_{job.status}_total")
+
+        if job.callback_url:
+            self._callback_executor.submit(self._notify, job)
+
+    def _notify(self, job: Job) -> None:
+        """Envia o job finalizado para o callback local"""
+        payload = json.dumps(self.to_dict(job)).encode("utf-8")
+        request = urllib.request.Request(
+            job.callback_url,
+            data=payload,
+            headers={"Content-Type": "application/json"},
+            method="POST"
+        )
+        try:
+            with _callback_opener.open(request, timeout=5):
+                pass
+        except Exception as e:
+            logger.warning(f"Erro ao notificar callback do job {job.id}: {e}")
+
+    @staticmethod
+    def to_dict(job: Job) -> dict:
+        return {
+            "job_id": job.id,
+            "kind": job.kind,
+            "status": job.status,
+            "created_at": job.created_at.isoformat(),
+            "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+            "result": job.result,
+            "error": job.error
+        }
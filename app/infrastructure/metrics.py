@@ -0,0 +1,44 @@
+from typing import Dict
+import threading
+
+
+class MetricsRegistry:
+    """
+    Registro simples de métricas em memória (contadores e gauges)
+
+    Compartilhado pelos serviços de infraestrutura e exposto pelo endpoint /metrics.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, float] = {}
+        self._gauges: Dict[str, float] = {}
+
+    def increment(self, name: str, value: float = 1) -> None:
+        """Incrementa um contador"""
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def set_gauge(self, name: str, value: float) -> None:
+        """Define o valor atual de um gauge"""
+        with self._lock:
+            self._gauges[name] = value
+
+    def get(self, name: str, default: float = 0) -> float:
+        """Retorna o valor de um contador ou gauge"""
+        with self._lock:
+            if name in self._counters:
+                return self._counters[name]
+            return self._gauges.get(name, default)
+
+    def snapshot(self) -> dict:
+        """Retorna uma cópia de todas as métricas"""
+        with self._lock:
+            return {
+                "counters": dict(self._counters),
+                "gauges": dict(self._gauges)
+            }
+
+
+# Instância global usada pela aplicação
+metrics = MetricsRegistry()
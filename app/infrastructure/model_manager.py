@@ -0,0 +1,332 @@
+from app.infrastructure.metrics import metrics
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from transformers import pipeline
+from typing import Callable, Dict, Optional
+import tempfile
+import threading
+import hashlib
+import stat
+import time
+import json
+import shutil
+import gc
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+MANIFEST_FILE = "offload_manifest.json"
+
+
+def default_offload_dir() -> str:
+    """Diretório privado do usuário no diretório temporário do sistema"""
+    user = os.getuid() if hasattr(os, "getuid") else os.getenv("USERNAME", "default")
+    return os.path.join(tempfile.gettempdir(), f"fastapi_ia_models-{user}")
+
+
+def ensure_private_dir(path: str) -> None:
+    """
+    Cria o diretório com permissão 0700 e recusa um diretório de outro usuário
+    ou acessível por outros
+
+    Raises:
+        PermissionError: Se o diretório existente não for privado
+    """
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    if not hasattr(os, "getuid"):
+        return
+    info = os.stat(path)
+    if info.st_uid != os.getuid() or stat.S_IMODE(info.st_mode) & 0o077:
+        raise PermissionError(f"Diretório de offload {path} não é privado do usuário atual")
+
+
+def offload_manifest(managed: "ManagedModel", pipe) -> dict:
+    """Identifica exatamente os pesos gravados (modelo, commit de origem e opções de carga)"""
+    config = pipe.model.config
+    return {
+        "name": managed.name,
+        "task": managed.task,
+        "model": managed.model,
+        "name_or_path": getattr(config, "_name_or_path", None),
+        "revision": getattr(config, "_commit_hash", None),
+        "model_kwargs": json.loads(json.dumps(managed.model_kwargs, sort_keys=True, default=str))
+    }
+
+
+class ManagedModel:
+    """
+    Pipeline sob controle do ModelManager
+
+    Pode ser chamado como o próprio pipeline; o modelo é carregado (ou
+    recarregado dos pesos locais) sob demanda e fica protegido contra
+    descarte enquanto uma inferência estiver em andamento.
+    """
+
+    def __init__(
+        self,
+        manager: "ModelManager",
+        name: str,
+        task: str,
+        model: str,
+        device: str,
+        model_kwargs: Optional[dict] = None,
+        post_load: Optional[Callable] = None
+    ):
+        self.manager = manager
+        self.name = name
+        self.task = task
+        self.model = model
+        self.device = device
+        self.model_kwargs = model_kwargs or {}
+        self.post_load = post_load
+
+        self.pipeline = None
+        self.size_bytes = 0
+        self.last_used = 0.0
+        self.in_use = 0
+        # Definido após a primeira carga, a partir do manifesto dos pesos
+        self.offload_path: Optional[str] = None
+        self.offload_manifest: Optional[dict] = None
+        self.offloaded = False
+        self.load_lock = threading.Lock()
+
+    def __call__(self, *args, **kwargs):
+        with self.manager.acquire(self) as pipe:
+            return pipe(*args, **kwargs)
+
+    def load(self) -> None:
+        """Carrega o modelo antecipadamente"""
+        with self.manager.acquire(self):
+            pass
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.pipeline is not None
+
+
+class ModelManager:
+    """
+    Gerencia os pipelines residentes dentro de um orçamento de memória
+
+    Registra o último uso de cada modelo e descarta os menos usados quando o
+    orçamento (`budget_bytes`) seria excedido ou quando ficam ociosos por mais de
+    `idle_seconds`. Após a primeira carga, os pesos são gravados em segundo plano
+    em safetensors em `offload_dir`; recarregar a partir deles usa mmap, o que
+    reduz o custo do cold start. Descartar é só liberar a referência: nenhuma
+    escrita acontece no caminho da requisição. Orçamento ou ociosidade 0
+    desativam o respectivo limite.
+    """
+
+    def __init__(self, budget_bytes: int = 0, idle_seconds: float = 0, offload_dir: Optional[str] = None):
+        self.budget_bytes = budget_bytes
+        self.idle_seconds = idle_seconds
+        self.offload_dir = offload_dir or default_offload_dir()
+        self._lock = threading.Lock()
+        self._models: Dict[str, ManagedModel] = {}
+        self._sweeper: Optional[threading.Thread] = None
+        self._offload_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="model-offload")
+
+    def register(
+        self,
+        name: str,
+        task: str,
+        model: str,
+        device: str,
+        model_kwargs: Optional[dict] = None,
+        post_load: Optional[Callable] = None
+    ) -> ManagedModel:
+        """Registra um pipeline (idempotente por nome) sem carregá-lo"""
+        with self._lock:
+            if name not in self._models:
+                self._models[name] = ManagedModel(self, name, task, model, device, model_kwargs, post_load)
+            self._start_sweeper()
+            return self._models[name]
+
+    @contextmanager
+    def acquire(self, managed: ManagedModel):
+        """Garante o modelo carregado e impede seu descarte durante o uso"""
+        with self._lock:
+            managed.in_use += 1
+            managed.last_used = time.monotonic()
+        try:
+            with managed.load_lock:
+                if managed.pipeline is None:
+                    # Libera espaço antes de carregar, usando o tamanho conhecido da última carga
+                    self._make_room(managed.size_bytes)
+                    self._load(managed)
+                    # Na primeira carga o tamanho só é conhecido depois
+                    self._make_room(0)
+                pipe = managed.pipeline
+            yield pipe
+        finally:
+            with self._lock:
+                managed.in_use -= 1
+                managed.last_used = time.monotonic()
+
+    def _load(self, managed: ManagedModel) -> None:
+        if managed.offloaded and not self._offload_is_trusted(managed.offload_path, managed.offload_manifest):
+            logger.warning(f"Pesos locais de {managed.name} não conferem com o manifesto, recarregando de {managed.model}")
+            managed.offloaded = False
+        source = managed.offload_path if managed.offloaded else managed.model
+        start = time.monotonic()
+        pipe = pipeline(
+            managed.task,
+            model=source,
+            device=managed.device,
+            model_kwargs=managed.model_kwargs
+        )
+        if managed.post_load is not None:
+            managed.post_load(pipe)
+        elapsed = time.monotonic() - start
+
+        managed.size_bytes = self._model_size(pipe)
+        managed.pipeline = pipe
+
+        metrics.increment("model_loads_total")
+        metrics.increment(f"model_{managed.name}_loads_total")
+        metrics.set_gauge(f"model_{managed.name}_last_load_seconds", elapsed)
+        metrics.set_gauge(f"model_{managed.name}_resident", 1)
+        self._publish_resident_bytes()
+        origin = "pesos locais (mmap)" if managed.offloaded else managed.model
+        logger.info(f"Modelo {managed.name} carregado de {origin} em {elapsed:.1f}s ({managed.size_bytes / 2**20:.0f} MB)")
+
+        if not managed.offloaded:
+            self._offload_executor.submit(self._write_offload, managed, pipe)
+
+    def _write_offload(self, managed: ManagedModel, pipe) -> None:
+        """
+        Grava os pesos em safetensors para recargas futuras via mmap (em segundo plano)
+
+        O diretório é identificado pelo hash do manifesto (tarefa, modelo,
+        commit de origem e model_kwargs), e só é reaproveitado se o manifesto
+        gravado nele for idêntico. A gravação vai para um diretório temporário
+        e é publicada com rename atômico; com vários workers (`uvicorn --workers N`)
+        o primeiro processo a terminar vence e os demais reaproveitam a cópia dele.
+        """
+        staging = None
+        try:
+            ensure_private_dir(self.offload_dir)
+            manifest = offload_manifest(managed, pipe)
+            digest = hashlib.sha256(json.dumps(manifest, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+            path = os.path.join(self.offload_dir, f"{managed.name}-{digest}")
+
+            if not self._offload_is_trusted(path, manifest):
+                staging = tempfile.mkdtemp(prefix=f".{managed.name}-", dir=self.offload_dir)
+                pipe.save_pretrained(staging, safe_serialization=True)
+                with open(os.path.join(staging, MANIFEST_FILE), "w", encoding="utf-8") as f:
+                    json.dump(manifest, f, sort_keys=True)
+                try:
+                    os.rename(staging, path)
+                    staging = None
+                except OSError:
+                    # Outro processo publicou antes: só vale se for o mesmo modelo
+                    if not self._offload_is_trusted(path, manifest):
+                        raise
+
+            managed.offload_path = path
+            managed.offload_manifest = manifest
+            managed.offloaded = True
+            logger.info(f"Pesos de {managed.name} disponíveis em {managed.offload_path}")
+        except Exception as e:
+            logger.warning(f"Erro ao gravar pesos de {managed.name}, recargas usarão {managed.model}: {e}")
+        finally:
+            if staging is not None:
+                shutil.rmtree(staging, ignore_errors=True)
+
+    @staticmethod
+    def _offload_is_trusted(path: Optional[str], manifest: Optional[dict]) -> bool:
+        """Confere se o diretório publicado contém os pesos descritos pelo manifesto"""
+        if not path or manifest is None:
+            return False
+        try:
+            with open(os.path.join(path, MANIFEST_FILE), encoding="utf-8") as f:
+                return json.load(f) == manifest
+        except (OSError, ValueError):
+            return False
+
+    @staticmethod
+    def _model_size(pipe) -> int:
+        tensors = list(pipe.model.parameters()) + list(pipe.model.buffers())
+        return sum(t.numel() * t.element_size() for t in tensors)
+
+    def _evict(self, managed: ManagedModel, reason: str) -> bool:
+        # Não bloqueia: um modelo sendo carregado por outra requisição não é candidato
+        if not managed.load_lock.acquire(blocking=False):
+            return False
+        try:
+            with self._lock:
+                if managed.in_use or managed.pipeline is None:
+                    return False
+                managed.pipeline = None
+            # Sem cópia local ainda, a recarga usa a origem original
+            gc.collect()
+        finally:
+            managed.load_lock.release()
+
+        metrics.increment("model_evictions_total")
+        metrics.increment(f"model_{managed.name}_evictions_total")
+        metrics.set_gauge(f"model_{managed.name}_resident", 0)
+        self._publish_resident_bytes()
+        logger.info(f"Modelo {managed.name} descartado ({reason})")
+        return True
+
+    def _make_room(self, needed_bytes: int) -> None:
+        """Descarta os modelos ociosos menos usados até `needed_bytes` caber no orçamento"""
+        if not self.budget_bytes:
+            return
+        skipped = set()
+        while self.resident_bytes() + needed_bytes > self.budget_bytes:
+            with self._lock:
+                candidates = [
+                    m for m in self._models.values()
+                    if m.pipeline is not None and not m.in_use and m.name not in skipped
+                ]
+            if not candidates:
+                logger.warning("Orçamento de memória excedido, mas todos os modelos estão em uso")
+                return
+            victim = min(candidates, key=lambda m: m.last_used)
+            if not self._evict(victim, "orçamento de memória"):
+                skipped.add(victim.name)
+
+    def evict_idle(self) -> None:
+        """Descarta os modelos ociosos há mais de `idle_seconds`"""
+        now = time.monotonic()
+        with self._lock:
+            idle = [
+                m for m in self._models.values()
+                if m.pipeline is not None and not m.in_use and now - m.last_used > self.idle_seconds
+            ]
+        for managed in idle:
+            self._evict(managed, f"ocioso há mais de {self.idle_seconds:.0f}s")
+
+    def _start_sweeper(self) -> None:
+        if not self.idle_seconds or self._sweeper is not None:
+            return
+        self._sweeper = threading.Thread(target=self._sweep, name="model-sweeper", daemon=True)
+        self._sweeper.start()
+
+    def _sweep(self) -> None:
+        interval = max(1.0, self.idle_seconds / 4)
+        while True:
+            time.sleep(interval)
+            try:
+                self.evict_idle()
+            except Exception as e:
+                logger.error(f"Erro ao descartar modelos ociosos: {e}")
+
+    def resident_bytes(self) -> int:
+        with self._lock:
+            return sum(m.size_bytes for m in self._models.values() if m.pipeline is not None)
+
+    def _publish_resident_bytes(self) -> None:
+        metrics.set_gauge("model_resident_bytes", self.resident_bytes())
+
+
+# Instância global compartilhada pelos serviços
+model_manager = ModelManager(
+    budget_bytes=int(float(os.getenv("MODEL_MEMORY_BUDGET_MB", "0")) * 2**20),
+    idle_seconds=float(os.getenv("MODEL_IDLE_SECONDS", "0")),
+    offload_dir=os.getenv("MODEL_OFFLOAD_DIR")
+)
@@ -0,0 +1,142 @@
+from app.domain.services.hate_speech_detection_service import HateSpeechDetectionService
+from app.domain.entities.hate_speech_analysis import HateSpeechAnalysis, HateSpeechDetection
+from app.infrastructure.near_duplicate_index import NearDuplicateIndex
+from app.infrastructure.metrics import metrics
+from app.infrastructure.rules_config import RulesConfig, RulesStore
+from dataclasses import replace
+from typing import Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class NearDuplicateHateSpeechService(HateSpeechDetectionService):
+    """
+    Decorator que reaproveita o veredicto de textos quase idênticos
+    pontuados recentemente (cópias levemente alteradas de campanhas)
+
+    As camadas de regras do serviço rodam sempre no texto recebido: o
+    veredicto só é reaproveitado se os achados delas forem os mesmos do
+    texto que o originou.
+    """
+
+    def __init__(
+        self,
+        service: HateSpeechDetectionService,
+        max_distance: int = 3,
+        max_entries: int = 10000,
+        ttl_seconds: float = 600,
+        min_shingles: int = 8,
+        max_new_shingles: int = 8,
+        rules_store: Optional[RulesStore] = None
+    ):
+        self.service = service
+        self.rules_store = rules_store
+        # Entradas marcadas com a versão das regras sob a qual foram calculadas
+        # (informada pelo serviço no resultado, a partir do snapshot que ele usou)
+        version = self._rules_version()
+        self._detect_index = NearDuplicateIndex(
+            max_distance, max_entries, ttl_seconds, min_shingles, version, max_new_shingles
+        )
+        self._analyze_index = NearDuplicateIndex(
+            max_distance, max_entries, ttl_seconds, min_shingles, version, max_new_shingles
+        )
+        if rules_store is not None:
+            rules_store.subscribe(self._on_rules_changed)
+
+    def _rules_version(self) -> Optional[int]:
+        return self.rules_store.current.version if self.rules_store is not None else None
+
+    def detect_hate_speech(self, text: str) -> bool:
+        return self.detect(text).is_hate_speech
+
+    def _reusable(self, index: NearDuplicateIndex, text: str, signature: tuple):
+        """Valor do vizinho indexado, se as regras encontram o mesmo no texto recebido"""
+        cached = index.lookup(text)
+        if cached is None:
+            return None
+        value, cached_signature = cached
+        if cached_signature != signature:
+            metrics.increment("near_duplicate_rule_mismatch_total")
+            return None
+        return value
+
+    def detect(self, text: str) -> HateSpeechDetection:
+        signature = self.service.rule_signature(text)
+        cached = self._reusable(self._detect_index, text, signature)
+        if cached is not None:
+            self._record_hit("detect")
+            return HateSpeechDetection(is_hate_speech=cached, verdict_reused=True)
+
+        self._record_miss("detect")
+        detection = self.service.detect(text)
+        # Veredictos degradados não são reaproveitados após a recuperação;
+        # veredictos calculados sob regras já substituídas são descartados pelo índice
+        if not detection.fallback_triggered:
+            self._detect_index.add(text, (detection.is_hate_speech, signature), detection.rules_version)
+        metrics.set_gauge("near_duplicate_detect_entries", len(self._detect_index))
+        return detection
+
+    def analyze_text(self, text: str) -> HateSpeechAnalysis:
+        signature = self.service.rule_signature(text)
+        cached = self._reusable(self._analyze_index, text, signature)
+        if cached is not None:
+            self._record_hit("analyze")
+            return replace(cached, text=text, verdict_reused=True)
+
+        self._record_miss("analyze")
+        analysis = self.service.analyze_text(text)
+        # Análises com erro não são reaproveitadas
+        if not analysis.fallback_triggered:
+            self._analyze_index.add(text, (analysis, signature), analysis.rules_version)
+            self._detect_index.add(text, (analysis.is_hate_speech, signature), analysis.rules_version)
+        metrics.set_gauge("near_duplicate_analyze_entries", len(self._analyze_index))
+        return analysis
+
+    def _record_hit(self, operation: str) -> None:
+        logger.info(f"Veredicto reaproveitado de texto quase idêntico ({operation})")
+        metrics.increment(f"near_duplicate_{operation}_hits_total")
+
+    def _record_miss(self, operation: str) -> None:
+        metrics.increment(f"near_duplicate_{operation}_misses_total")
+
+    def _on_rules_changed(self, old: RulesConfig, new: RulesConfig) -> None:
+        """
+        Invalida apenas os veredictos que a nova versão das regras pode alterar
+
+        Entradas mantidas ainda podem casar com textos quase idênticos que
+        contenham um termo novo; esses são barrados na busca, porque a
+        assinatura de regras do texto recebido deixa de conferir.
+        """
+        models_changed = (
+            old.hate_speech_labels != new.hate_speech_labels
+            or old.hate_indicators != new.hate_indicators
+            or old.hate_threshold != new.hate_threshold
+            or old.classifier_thresholds != new.classifier_thresholds
+        )
+        if models_changed:
+            # Labels e thresholds dos modelos afetam qualquer texto que chegou a eles
+            removed = len(self._detect_index) + len(self._analyze_index)
+            self._detect_index.clear(new.version)
+            self._analyze_index.clear(new.version)
+        else:
+            changed_terms = (
+                set(old.dangerous_patterns) ^ set(new.dangerous_patterns)
+                | set(old.hate_keywords) ^ set(new.hate_keywords)
+            )
+            if not changed_terms:
+                self._detect_index.invalidate(lambda text: False, new.version)
+                self._analyze_index.invalidate(lambda text: False, new.version)
+                return
+
+            def affected(text: str) -> bool:
+                text_lower = text.lower()
+                return any(term in text_lower for term in changed_terms)
+
+            removed = (
+                self._detect_index.invalidate(affected, new.version)
+                + self._analyze_index.invalidate(affected, new.version)
+            )
+
+        logger.info(f"Regras versão {new.version}: {removed} veredictos invalidados")
+        metrics.increment("near_duplicate_invalidated_total", removed)
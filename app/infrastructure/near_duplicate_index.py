@@ -0,0 +1,176 @@
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+import hashlib
+import threading
+import time
+import re
+
+
+def shingles(text: str, ngram: int = 3) -> List[str]:
+    """
+    N-gramas de caracteres do texto normalizado
+
+    Pontuação, emojis e diferenças de espaço/caixa são removidos antes, para
+    que cópias levemente alteradas gerem conjuntos próximos.
+    """
+    normalized = re.sub(r"\s+", " ", re.sub(r"[^\w\s]", "", text.lower())).strip()
+    if len(normalized) < ngram:
+        return [normalized] if normalized else []
+    return [normalized[i:i + ngram] for i in range(len(normalized) - ngram + 1)]
+
+
+def simhash(text: str, ngram: int = 3, bits: int = 64) -> int:
+    """SimHash dos n-gramas de caracteres do texto normalizado"""
+    vector = [0] * bits
+    for shingle in shingles(text, ngram):
+        digest = int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=bits // 8).digest(), "big")
+        for i in range(bits):
+            vector[i] += 1 if digest >> i & 1 else -1
+
+    return sum(1 << i for i in range(bits) if vector[i] > 0)
+
+
+class NearDuplicateIndex:
+    """
+    Índice LSH em memória (SimHash) de textos pontuados recentemente
+
+    A busca usa bandas: com `max_distance` bits de tolerância, o hash é dividido
+    em `max_distance + 1` bandas e, pelo princípio da casa dos pombos, qualquer
+    vizinho dentro da distância compartilha ao menos uma banda idêntica.
+    Como a distância do SimHash não cresce com o tamanho do texto, cada
+    candidato é confirmado pelos n-gramas: o texto buscado pode ter no máximo
+    `max_new_shingles` n-gramas ausentes do texto indexado, o que impede que
+    conteúdo acrescentado a um texto longo herde o veredicto dele.
+    Com `version` definido, inserções calculadas sob outra versão das regras
+    são descartadas. A memória é limitada por `max_entries` (LRU) e `ttl_seconds`. Textos com
+    menos de `min_shingles` n-gramas após a normalização (só emojis, só
+    pontuação, textos curtos demais) não são indexados nem buscados, já que
+    compartilhariam o mesmo fingerprint.
+    """
+
+    BITS = 64
+
+    def __init__(
+        self,
+        max_distance: int = 3,
+        max_entries: int = 10000,
+        ttl_seconds: float = 600,
+        min_shingles: int = 8,
+        version: Optional[int] = None,
+        max_new_shingles: int = 8
+    ):
+        if not 0 <= max_distance < self.BITS:
+            raise ValueError(f"max_distance deve estar entre 0 e {self.BITS - 1}")
+        self.max_distance = max_distance
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.min_shingles = min_shingles
+        self.version = version
+        self.max_new_shingles = max_new_shingles
+
+        self._bands = max_distance + 1
+        self._band_width = -(-self.BITS // self._bands)
+        self._lock = threading.Lock()
+        # fingerprint -> (valor, instante de inserção, texto original)
+        self._entries: "OrderedDict[int, Tuple[Any, float, str]]" = OrderedDict()
+        self._buckets: Dict[Tuple[int, int], Set[int]] = {}
+
+    def _band_keys(self, fingerprint: int):
+        mask = (1 << self._band_width) - 1
+        for band in range(self._bands):
+            yield band, fingerprint >> (band * self._band_width) & mask
+
+    def _fingerprint(self, text: str) -> Optional[int]:
+        if len(shingles(text)) < self.min_shingles:
+            return None
+        return simhash(text, bits=self.BITS)
+
+    def lookup(self, text: str) -> Optional[Any]:
+        """Retorna o valor do vizinho mais próximo dentro da distância, se houver"""
+        fingerprint = self._fingerprint(text)
+        if fingerprint is None:
+            return None
+        text_shingles = set(shingles(text))
+        now = time.monotonic()
+
+        with self._lock:
+            candidates = set()
+            for key in self._band_keys(fingerprint):
+                candidates |= self._buckets.get(key, set())
+
+            nearby = []
+            for candidate in candidates:
+                _, inserted_at, _ = self._entries[candidate]
+                if now - inserted_at > self.ttl_seconds:
+                    self._remove(candidate)
+                    continue
+                distance = bin(candidate ^ fingerprint).count("1")
+                if distance <= self.max_distance:
+                    nearby.append((distance, candidate))
+
+            for _, candidate in sorted(nearby):
+                value, _, indexed_text = self._entries[candidate]
+                if len(text_shingles - set(shingles(indexed_text))) > self.max_new_shingles:
+                    continue
+                self._entries.move_to_end(candidate)
+                return value
+            return None
+
+    def add(self, text: str, value: Any, version: Optional[int] = None) -> bool:
+        """
+        Indexa o valor calculado para o texto
+
+        Returns:
+            bool: False se o texto não é indexável ou o valor é de outra versão das regras
+        """
+        fingerprint = self._fingerprint(text)
+        if fingerprint is None:
+            return False
+
+        with self._lock:
+            if version != self.version:
+                return False
+            if fingerprint in self._entries:
+                self._remove(fingerprint)
+            self._entries[fingerprint] = (value, time.monotonic(), text)
+            for key in self._band_keys(fingerprint):
+                self._buckets.setdefault(key, set()).add(fingerprint)
+
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+            return True
+
+    def _remove(self, fingerprint: int) -> None:
+        del self._entries[fingerprint]
+        for key in self._band_keys(fingerprint):
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.discard(fingerprint)
+                if not bucket:
+                    del self._buckets[key]
+
+    def invalidate(self, predicate: Callable[[str], bool], version: Optional[int] = None) -> int:
+        """
+        Remove as entradas cujo texto original satisfaz o predicado
+
+        A partir daqui só são aceitas inserções da nova `version`.
+        """
+        with self._lock:
+            if version is not None:
+                self.version = version
+            stale = [fingerprint for fingerprint, (_, _, text) in self._entries.items() if predicate(text)]
+            for fingerprint in stale:
+                self._remove(fingerprint)
+            return len(stale)
+
+    def clear(self, version: Optional[int] = None) -> None:
+        with self._lock:
+            if version is not None:
+                self.version = version
+            self._entries.clear()
+            self._buckets.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
@@ -0,0 +1,129 @@
+from app.infrastructure.metrics import metrics
+from concurrent.futures import Future, wait as wait_futures
+from enum import IntEnum
+from typing import Any, Callable, Iterable, List, Optional, Tuple
+import itertools
+import threading
+import queue
+import time
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Priority(IntEnum):
+    """Prioridades do escalonador (menor valor executa primeiro)"""
+    INTERACTIVE = 0
+    BULK = 1
+
+
+class PriorityScheduler:
+    """
+    Escalonador com fila de prioridade e pool fixo de workers
+
+    Toda inferência passa por aqui: requisições interativas (detect, idade)
+    sempre saem da fila antes de trabalhos em lote (analyze, jobs), que só
+    ocupam os workers quando não há trabalho interativo aguardando.
+
+    Uma tarefa pode deixar trabalho em segundo plano ainda rodando (modelos
+    abandonados do ensemble); com `hold_worker` o worker só pega a próxima
+    tarefa depois que ele termina, de modo que a carga extra aparece como
+    espera de fila em vez de disputar núcleos com a próxima requisição.
+    """
+
+    def __init__(self, workers: int = 2):
+        self.workers = workers
+        self._queue = queue.PriorityQueue()
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        self._pending = {priority: 0 for priority in Priority}
+        self._threads = []
+        self._wait_observers: List[Tuple[Optional[Priority], Callable[[float], None]]] = []
+        self._worker_state = threading.local()
+
+    def _ensure_started(self) -> None:
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._run, name=f"scheduler-worker-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+            logger.info(f"Escalonador iniciado com {self.workers} workers")
+
+    def add_wait_observer(self, observer: Callable[[float], None], priority: Optional[Priority] = None) -> None:
+        """
+        Registra uma função chamada com o tempo de espera de cada tarefa
+
+        Com `priority`, só recebe as esperas das tarefas dessa prioridade.
+        """
+        self._wait_observers.append((priority, observer))
+
+    def hold_worker(self, futures: Iterable[Future]) -> None:
+        """
+        Mantém o worker atual ocupado até `futures` terminarem, depois de
+        publicar o resultado da tarefa em andamento
+
+        Fora de um worker do escalonador não tem efeito.
+        """
+        held = getattr(self._worker_state, "held", None)
+        if held is not None:
+            held.extend(futures)
+
+    def submit(self, fn: Callable[..., Any], *args, priority: Priority = Priority.BULK) -> Future:
+        """Enfileira `fn(*args)` e retorna um Future com o resultado"""
+        self._ensure_started()
+        future = Future()
+        with self._lock:
+            self._pending[priority] += 1
+            self._publish_depth(priority)
+        metrics.increment(f"scheduler_{priority.name.lower()}_submitted_total")
+        self._queue.put((int(priority), next(self._sequence), time.monotonic(), fn, args, future))
+        return future
+
+    def _run(self) -> None:
+        self._worker_state.held = []
+        while True:
+            priority, _, enqueued_at, fn, args, future = self._queue.get()
+            priority = Priority(priority)
+            name = priority.name.lower()
+            with self._lock:
+                self._pending[priority] -= 1
+                self._publish_depth(priority)
+
+            wait = time.monotonic() - enqueued_at
+            metrics.increment(f"scheduler_{name}_wait_seconds_total", wait)
+            metrics.set_gauge(f"scheduler_{name}_last_wait_seconds", wait)
+            for observed_priority, observer in self._wait_observers:
+                if observed_priority is None or observed_priority == priority:
+                    observer(wait)
+
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(fn(*args))
+            except BaseException as e:
+                future.set_exception(e)
+            metrics.increment(f"scheduler_{name}_completed_total")
+            self._release_held()
+
+    def _release_held(self) -> None:
+        held = self._worker_state.held
+        if not held:
+            return
+        start = time.monotonic()
+        wait_futures(held)
+        held.clear()
+        metrics.increment("scheduler_held_seconds_total", time.monotonic() - start)
+
+    def _publish_depth(self, priority: Priority) -> None:
+        metrics.set_gauge(f"scheduler_{priority.name.lower()}_queue_depth", self._pending[priority])
+
+    def queue_depth(self, priority: Priority) -> int:
+        with self._lock:
+            return self._pending[priority]
+
+
+# Instância global compartilhada pelos endpoints
+scheduler = PriorityScheduler(workers=int(os.getenv("SCHEDULER_WORKERS", "2")))
@@ -0,0 +1,204 @@
+from app.infrastructure.metrics import metrics
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+import threading
+import time
+import json
+import re
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RULES_PATH = Path(__file__).resolve().parents[2] / "config" / "rules.json"
+
+# Mesmas faixas aceitas pela entidade AgeRating
+VALID_AGES = (0, 10, 12, 14, 16, 18)
+
+
+def _terms(data: dict, field: str) -> Tuple[str, ...]:
+    """Lista de textos não vazios (uma string solta viraria uma tupla de caracteres)"""
+    value = data[field]
+    if not isinstance(value, list):
+        raise ValueError(f"Arquivo de regras inválido: {field} deve ser uma lista")
+    if any(not isinstance(term, str) or not term.strip() for term in value):
+        raise ValueError(f"Arquivo de regras inválido: {field} contém itens vazios ou que não são texto")
+    return tuple(value)
+
+
+@dataclass(frozen=True)
+class RulesConfig:
+    """Versão imutável das regras (labels, palavras-chave, padrões e thresholds)"""
+    version: int
+    hate_speech_labels: Tuple[str, ...]
+    hate_indicators: Tuple[str, ...]
+    hate_keywords: Tuple[str, ...]
+    dangerous_patterns: Tuple[str, ...]
+    hate_threshold: float
+    classifier_thresholds: Dict[str, float]
+    age_labels: Dict[str, int]
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "RulesConfig":
+        """
+        Valida e converte o conteúdo do arquivo de regras
+
+        Raises:
+            ValueError: Se algum campo estiver ausente ou inválido
+        """
+        try:
+            rules = cls(
+                version=int(data["version"]),
+                hate_speech_labels=_terms(data, "hate_speech_labels"),
+                hate_indicators=_terms(data, "hate_indicators"),
+                hate_keywords=_terms(data, "hate_keywords"),
+                dangerous_patterns=_terms(data, "dangerous_patterns"),
+                hate_threshold=float(data["hate_threshold"]),
+                classifier_thresholds={
+                    str(model): float(threshold) for model, threshold in data["classifier_thresholds"].items()
+                },
+                age_labels={str(label): int(age) for label, age in data["age_labels"].items()}
+            )
+        except (KeyError, TypeError, AttributeError) as e:
+            raise ValueError(f"Arquivo de regras inválido: {e}")
+
+        if not rules.hate_speech_labels or not rules.age_labels:
+            raise ValueError("Arquivo de regras inválido: labels vazias")
+        invalid_ages = set(rules.age_labels.values()) - set(VALID_AGES)
+        if invalid_ages:
+            raise ValueError(f"Arquivo de regras inválido: idades não permitidas: {sorted(invalid_ages)}")
+        if not 0.0 <= rules.hate_threshold <= 1.0:
+            raise ValueError(f"Arquivo de regras inválido: hate_threshold fora de [0, 1]: {rules.hate_threshold}")
+        out_of_range = [model for model, threshold in rules.classifier_thresholds.items() if not 0.0 <= threshold <= 1.0]
+        if out_of_range:
+            raise ValueError(f"Arquivo de regras inválido: thresholds fora de [0, 1]: {sorted(out_of_range)}")
+        unknown = set(rules.hate_indicators) - set(rules.hate_speech_labels)
+        if unknown:
+            raise ValueError(f"Arquivo de regras inválido: indicadores fora das labels: {sorted(unknown)}")
+        return rules
+
+
+class RuleMatcher:
+    """Regras de uma versão com os padrões e palavras-chave já compilados"""
+
+    def __init__(self, config: RulesConfig):
+        self.config = config
+        self._pattern_regex = self._compile(config.dangerous_patterns)
+        self._keyword_regex = self._compile(config.hate_keywords)
+
+    @staticmethod
+    def _compile(terms: Tuple[str, ...]) -> Optional["re.Pattern"]:
+        if not terms:
+            return None
+        return re.compile("|".join(re.escape(term) for term in terms))
+
+    def find_pattern(self, text: str) -> Optional[str]:
+        """Retorna o primeiro padrão perigoso encontrado no texto (em minúsculas)"""
+        match = self._pattern_regex.search(text) if self._pattern_regex else None
+        return match.group(0) if match else None
+
+    def find_keyword(self, text: str) -> Optional[str]:
+        """Retorna a primeira palavra-chave encontrada no texto (em minúsculas)"""
+        match = self._keyword_regex.search(text) if self._keyword_regex else None
+        return match.group(0) if match else None
+
+
+def load_rules(path: str) -> RulesConfig:
+    with open(path, encoding="utf-8") as f:
+        return RulesConfig.from_dict(json.load(f))
+
+
+class RulesStore:
+    """
+    Mantém a versão atual das regras e recarrega o arquivo quando ele muda
+
+    Um thread em segundo plano verifica o mtime do arquivo a cada
+    `poll_interval` segundos. A nova versão só substitui a anterior se for
+    válida e tiver outro número de `version`; os assinantes recebem
+    (versão antiga, versão nova).
+    """
+
+    def __init__(self, path: str, poll_interval: float = 2.0):
+        self.path = path
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._current: Optional[RulesConfig] = None
+        self._mtime: Optional[float] = None
+        self._subscribers: List[Callable[[RulesConfig, RulesConfig], None]] = []
+        self._watcher: Optional[threading.Thread] = None
+
+    @property
+    def current(self) -> RulesConfig:
+        with self._lock:
+            if self._current is None:
+                self._mtime = os.path.getmtime(self.path)
+                self._current = load_rules(self.path)
+                metrics.set_gauge("rules_version", self._current.version)
+                logger.info(f"Regras versão {self._current.version} carregadas de {self.path}")
+            return self._current
+
+    def subscribe(self, callback: Callable[[RulesConfig, RulesConfig], None]) -> None:
+        self._subscribers.append(callback)
+
+    def start_watching(self) -> None:
+        """Inicia o monitoramento do arquivo (idempotente)"""
+        self.current
+        with self._lock:
+            if self._watcher is not None:
+                return
+            self._watcher = threading.Thread(target=self._watch, name="rules-watcher", daemon=True)
+            self._watcher.start()
+
+    def _watch(self) -> None:
+        while True:
+            time.sleep(self.poll_interval)
+            try:
+                if os.path.getmtime(self.path) != self._mtime:
+                    self.reload()
+            except Exception as e:
+                logger.error(f"Erro ao verificar arquivo de regras: {e}")
+
+    def reload(self) -> bool:
+        """
+        Recarrega o arquivo de regras
+
+        Returns:
+            bool: True se uma nova versão foi aplicada
+        """
+        self.current
+        with self._lock:
+            self._mtime = os.path.getmtime(self.path)
+            try:
+                new = load_rules(self.path)
+            except Exception as e:
+                metrics.increment("rules_reload_failures_total")
+                logger.error(f"Regras inválidas em {self.path}, mantendo versão {self._current.version}: {e}")
+                return False
+
+            old = self._current
+            if new == old:
+                return False
+            if new.version == old.version:
+                # A versão marca os veredictos em cache; sem mudança, os antigos continuariam válidos
+                metrics.increment("rules_reload_failures_total")
+                logger.error(f"Regras alteradas sem mudança de versão ({new.version}), alteração ignorada")
+                return False
+            self._current = new
+
+        metrics.increment("rules_reloads_total")
+        metrics.set_gauge("rules_version", new.version)
+        logger.info(f"Regras atualizadas: versão {old.version} -> {new.version}")
+        for callback in self._subscribers:
+            try:
+                callback(old, new)
+            except Exception as e:
+                logger.error(f"Erro ao aplicar regras versão {new.version}: {e}")
+        return True
+
+
+# Instância global compartilhada pelos serviços
+rules_store = RulesStore(
+    os.getenv("RULES_CONFIG_PATH", str(DEFAULT_RULES_PATH)),
+    poll_interval=float(os.getenv("RULES_POLL_INTERVAL_SECONDS", "2.0"))
+)
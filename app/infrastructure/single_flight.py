@@ -0,0 +1,74 @@
+from app.infrastructure.metrics import metrics
+from concurrent.futures import CancelledError, Future
+from typing import Callable, Dict, Hashable
+import unicodedata
+import threading
+import re
+
+
+def normalize_text(text: str) -> str:
+    """Normalização usada como chave de coalescência"""
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFC", text)).strip()
+
+
+class SingleFlight:
+    """
+    Coalescência de chamadas idênticas simultâneas (single-flight)
+
+    A primeira chamada para uma chave inicia o trabalho (por exemplo,
+    enfileirando-o no escalonador); as chamadas que chegam com a mesma chave
+    enquanto ele não termina aguardam o mesmo trabalho, sem ocupar nenhum
+    worker. Cada chamada recebe seu próprio Future, encadeado ao do trabalho:
+    cancelar um deles (cliente desconectado, timeout) não cancela o trabalho
+    compartilhado nem afeta as demais chamadas.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, Future] = {}
+
+    def submit(self, key: Hashable, start: Callable[[], Future]) -> Future:
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = start()
+                self._calls[key] = future
+            metrics.set_gauge(f"{self.name}_in_flight", len(self._calls))
+
+        self._record(coalesced=not leader)
+        waiter = Future()
+        # Fora do lock: os callbacks rodam na hora se o Future já terminou
+        if leader:
+            future.add_done_callback(lambda done: self._forget(key, done))
+        future.add_done_callback(lambda done: self._propagate(done, waiter))
+        return waiter
+
+    @staticmethod
+    def _propagate(source: Future, waiter: Future) -> None:
+        """Copia o resultado do trabalho para o Future de uma chamada, se ela não foi cancelada"""
+        if not waiter.set_running_or_notify_cancel():
+            return
+        if source.cancelled():
+            waiter.set_exception(CancelledError())
+        elif source.exception() is not None:
+            waiter.set_exception(source.exception())
+        else:
+            waiter.set_result(source.result())
+
+    def _forget(self, key: Hashable, future: Future) -> None:
+        with self._lock:
+            if self._calls.get(key) is future:
+                del self._calls[key]
+            metrics.set_gauge(f"{self.name}_in_flight", len(self._calls))
+
+    def _record(self, coalesced: bool) -> None:
+        metrics.increment(f"{self.name}_calls_total")
+        if coalesced:
+            metrics.increment(f"{self.name}_coalesced_total")
+        calls = metrics.get(f"{self.name}_calls_total")
+        metrics.set_gauge(
+            f"{self.name}_coalesced_ratio",
+            metrics.get(f"{self.name}_coalesced_total") / calls if calls else 0.0
+        )
@@ -0,0 +1,93 @@
+"""
+Treina o pré-filtro leve a partir dos veredictos do serviço completo
+
+Uso:
+    python -m app.infrastructure.train_prefilter corpus.jsonl --output prefilter.npz
+
+O corpus é um arquivo JSONL com um objeto por linha contendo `text` e,
+opcionalmente, `is_hate_speech`. Linhas sem veredicto são rotuladas pelo
+HuggingFaceHateSpeechService (sem pré-filtro) e podem ser gravadas com
+--save-verdicts para reaproveitamento.
+"""
+from app.infrastructure.hashed_ngram_prefilter import HashedNgramPrefilter
+import argparse
+import json
+import random
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def load_corpus(path: str) -> list:
+    records = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                records.append(json.loads(line))
+    return records
+
+
+def record_verdicts(records: list) -> list:
+    """Preenche os veredictos ausentes usando o ensemble completo"""
+    missing = [r for r in records if "is_hate_speech" not in r]
+    if not missing:
+        return records
+
+    from app.infrastructure.huggingface_hate_speech_service import HuggingFaceHateSpeechService
+    service = HuggingFaceHateSpeechService()
+    for i, record in enumerate(missing, start=1):
+        record["is_hate_speech"] = service.detect_hate_speech(record["text"])
+        if i % 100 == 0:
+            logger.info(f"{i}/{len(missing)} veredictos registrados")
+    return records
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Treina o pré-filtro de n-gramas")
+    parser.add_argument("corpus", help="Arquivo JSONL com o corpus local")
+    parser.add_argument("--output", required=True, help="Arquivo .npz de saída")
+    parser.add_argument("--target-miss-rate", type=float, default=0.01,
+                        help="Fração máxima de positivos que pode ser desviada")
+    parser.add_argument("--holdout", type=float, default=0.2,
+                        help="Fração do corpus reservada para calibração")
+    parser.add_argument("--epochs", type=int, default=5)
+    parser.add_argument("--n-features", type=int, default=2 ** 18)
+    parser.add_argument("--save-verdicts", help="Grava o corpus rotulado em JSONL")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    records = record_verdicts(load_corpus(args.corpus))
+    if args.save_verdicts:
+        with open(args.save_verdicts, "w", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    random.Random(42).shuffle(records)
+    split = int(len(records) * (1 - args.holdout))
+    train, calibration = records[:split], records[split:]
+
+    prefilter = HashedNgramPrefilter(n_features=args.n_features)
+    prefilter.fit(
+        [r["text"] for r in train],
+        [bool(r["is_hate_speech"]) for r in train],
+        epochs=args.epochs
+    )
+    calibration_texts = [r["text"] for r in calibration]
+    calibration_labels = [bool(r["is_hate_speech"]) for r in calibration]
+    prefilter.calibrate(calibration_texts, calibration_labels, args.target_miss_rate)
+
+    report = prefilter.evaluate(calibration_texts, calibration_labels)
+    logger.info(
+        f"Calibração: {report['samples']} amostras, "
+        f"fração desviada={report['diverted_fraction']:.3f}, "
+        f"taxa de perda={report['miss_rate']:.4f}"
+    )
+
+    prefilter.save(args.output)
+    logger.info(f"Pré-filtro salvo em {args.output}")
+
+
+if __name__ == "__main__":
+    main()
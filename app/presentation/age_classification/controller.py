@@ -1,13 +1,18 @@
 from app.domain.usecases.age_classification_usecase import AgeClassificationUseCase
 from app.infrastructure.huggingface_age_service import HuggingFaceAgeService
+from app.infrastructure.priority_scheduler import Priority, scheduler
 from .schemas import AgeRatingRequest
 
-def classify_age(request: AgeRatingRequest) -> dict:
+def _classify(text: str) -> int:
     # Criar o service
     service = HuggingFaceAgeService()
     
     # Criar o usecase com o service
     usecase = AgeClassificationUseCase(service)
     
-    rating = usecase.execute(request.text)
+    return usecase.execute(text)
+
+def classify_age(request: AgeRatingRequest) -> dict:
+    # Requisição interativa: passa à frente dos trabalhos em lote
+    rating = scheduler.submit(_classify, request.text, priority=Priority.INTERACTIVE).result()
     return {"rating": f"{rating}+"}
\ No newline at end of file
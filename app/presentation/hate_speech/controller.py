@@ -2,12 +2,24 @@ from app.domain.usecases.detect_hate_speech_usecase import DetectHateSpeechUseCa
 from app.presentation.hate_speech.schemas import (
     HateSpeechRequest, 
     HateSpeechDetectionResponse, 
-    HateSpeechAnalysisResponse
+    HateSpeechAnalysisResponse,
+    HateSpeechJobRequest,
+    HateSpeechJobResponse
 )
+from app.infrastructure.priority_scheduler import Priority, scheduler
+from app.infrastructure.job_manager import JobManager
+from app.infrastructure.single_flight import SingleFlight, normalize_text
+from functools import partial
+from typing import Optional
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Requisições simultâneas com o mesmo texto normalizado compartilham uma única
+# inferência; a coalescência acontece antes da fila, então só o líder ocupa um worker
+single_flight = SingleFlight("hate_speech_coalescing")
+
 class HateSpeechController:
     """
     Controller para endpoints de hate speech
@@ -16,10 +28,12 @@ class HateSpeechController:
     def __init__(
         self, 
         detect_usecase: DetectHateSpeechUseCase,
-        analyze_usecase: AnalyzeHateSpeechUseCase
+        analyze_usecase: AnalyzeHateSpeechUseCase,
+        job_manager: JobManager
     ):
         self.detect_usecase = detect_usecase
         self.analyze_usecase = analyze_usecase
+        self.job_manager = job_manager
     
     async def detect_hate_speech(self, request: HateSpeechRequest) -> HateSpeechDetectionResponse:
         """
@@ -27,7 +41,15 @@ class HateSpeechController:
         """
         logger.info(f"Requisição de detecção recebida para texto com {len(request.text)} caracteres")
         
-        result = self.detect_usecase.execute(request.text)
+        # Executa fora do event loop, com prioridade sobre análises e jobs em lote
+        result = await asyncio.wrap_future(single_flight.submit(
+            ("detect", normalize_text(request.text)),
+            lambda: scheduler.submit(self.detect_usecase.execute, request.text, priority=Priority.INTERACTIVE)
+        ))
+        
+        # O resultado pode ter vindo de uma requisição com espaçamento diferente
+        if "text_length" in result:
+            result = {**result, "text_length": len(request.text)}
         
         return HateSpeechDetectionResponse(**result)
     
@@ -37,6 +59,38 @@ class HateSpeechController:
         """
         logger.info(f"Requisição de análise recebida para texto com {len(request.text)} caracteres")
         
-        result = self.analyze_usecase.execute(request.text)
+        result = await asyncio.wrap_future(single_flight.submit(
+            ("analyze", normalize_text(request.text)),
+            lambda: scheduler.submit(self.analyze_usecase.execute, request.text, priority=Priority.BULK)
+        ))
+        
+        # Cada requisição recebe sua própria cópia com o texto original
+        if result.get("analysis"):
+            result = {**result, "analysis": {**result["analysis"], "text": request.text}}
         
         return HateSpeechAnalysisResponse(**result)
+    
+    async def submit_job(self, request: HateSpeechJobRequest) -> HateSpeechJobResponse:
+        """
+        Enfileira uma análise assíncrona com prioridade de lote
+        """
+        usecase = self.detect_usecase if request.kind == "detect" else self.analyze_usecase
+        job = self.job_manager.submit(
+            kind=request.kind,
+            fn=partial(usecase.execute, request.text),
+            priority=Priority.BULK,
+            callback_url=request.callback_url
+        )
+        logger.info(f"Job {job.id} ({job.kind}) enfileirado")
+        
+        return HateSpeechJobResponse(**JobManager.to_dict(job))
+    
+    async def get_job(self, job_id: str) -> Optional[HateSpeechJobResponse]:
+        """
+        Consulta o estado de um job
+        """
+        job = self.job_manager.get(job_id)
+        if job is None:
+            return None
+        
+        return HateSpeechJobResponse(**JobManager.to_dict(job))
@@ -3,16 +3,62 @@ from app.presentation.hate_speech.controller import HateSpeechController
 from app.presentation.hate_speech.schemas import (
     HateSpeechRequest,
     HateSpeechDetectionResponse,
-    HateSpeechAnalysisResponse
+    HateSpeechAnalysisResponse,
+    HateSpeechJobRequest,
+    HateSpeechJobResponse
 )
 from app.domain.usecases.detect_hate_speech_usecase import DetectHateSpeechUseCase, AnalyzeHateSpeechUseCase
 from app.infrastructure.huggingface_hate_speech_service import HuggingFaceHateSpeechService
+from app.infrastructure.near_duplicate_hate_speech_service import NearDuplicateHateSpeechService
+from app.infrastructure.priority_scheduler import Priority, scheduler
+from app.infrastructure.degradation_controller import degradation_controller
+from app.infrastructure.rules_config import rules_store
+from app.infrastructure.job_manager import JobManager, JobLimitExceeded
+from functools import lru_cache
+import threading
+import os
 
 router = APIRouter(prefix="/hate_speech", tags=["Hate Speech Detection"])
 
 # Dependency Injection
+# lru_cache não trava: sem o lock, requisições simultâneas durante a primeira carga
+# dos modelos construiriam cada uma o seu serviço (e registrariam observadores duplicados)
+_service_lock = threading.Lock()
+_job_manager_lock = threading.Lock()
+
 def get_hate_speech_service():
-    return HuggingFaceHateSpeechService()
+    with _service_lock:
+        return _build_hate_speech_service()
+
+# Instância única: os modelos são carregados uma vez e o estado (pré-filtro, métricas) é compartilhado
+@lru_cache(maxsize=None)
+def _build_hate_speech_service():
+    service = HuggingFaceHateSpeechService(
+        prefilter_path=os.getenv("HATE_SPEECH_PREFILTER_PATH"),
+        degradation_controller=degradation_controller,
+        concurrent_ensemble=os.getenv("HATE_SPEECH_ENSEMBLE_MODE", "sequential") == "concurrent",
+        ensemble_torch_threads=int(os.getenv("HATE_SPEECH_ENSEMBLE_TORCH_THREADS", "0")) or None,
+        # Cada worker do escalonador pode rodar um ensemble ao mesmo tempo, e
+        # fica ocupado até os modelos abandonados após um curto-circuito terminarem
+        scheduler=scheduler,
+        compiled_models=os.getenv("HATE_SPEECH_COMPILED_MODELS", "0") == "1",
+        rules_store=rules_store
+    )
+    # A latência de fila interativa alimenta o controlador de degradação
+    # (trabalhos em lote esperam atrás dos interativos por projeto e não contam);
+    # registrado só depois que o serviço foi construído com sucesso
+    scheduler.add_wait_observer(degradation_controller.observe, priority=Priority.INTERACTIVE)
+    # Textos quase idênticos pontuados recentemente reaproveitam o veredicto
+    # (requisições idênticas simultâneas são coalescidas no controller, antes da fila)
+    return NearDuplicateHateSpeechService(
+        service,
+        max_distance=int(os.getenv("HATE_SPEECH_NEAR_DUPLICATE_DISTANCE", "3")),
+        max_entries=int(os.getenv("HATE_SPEECH_NEAR_DUPLICATE_MAX_ENTRIES", "10000")),
+        ttl_seconds=float(os.getenv("HATE_SPEECH_NEAR_DUPLICATE_TTL", "600")),
+        min_shingles=int(os.getenv("HATE_SPEECH_NEAR_DUPLICATE_MIN_SHINGLES", "8")),
+        max_new_shingles=int(os.getenv("HATE_SPEECH_NEAR_DUPLICATE_MAX_NEW_SHINGLES", "8")),
+        rules_store=rules_store
+    )
 
 def get_detect_usecase(service = Depends(get_hate_speech_service)):
     return DetectHateSpeechUseCase(service)
@@ -20,11 +66,20 @@ def get_detect_usecase(service = Depends(get_hate_speech_service)):
 def get_analyze_usecase(service = Depends(get_hate_speech_service)):
     return AnalyzeHateSpeechUseCase(service)
 
+def get_job_manager():
+    with _job_manager_lock:
+        return _build_job_manager()
+
+@lru_cache(maxsize=None)
+def _build_job_manager():
+    return JobManager(scheduler, max_jobs=int(os.getenv("JOBS_MAX_RETAINED", "1000")))
+
 def get_controller(
     detect_usecase = Depends(get_detect_usecase),
-    analyze_usecase = Depends(get_analyze_usecase)
+    analyze_usecase = Depends(get_analyze_usecase),
+    job_manager = Depends(get_job_manager)
 ):
-    return HateSpeechController(detect_usecase, analyze_usecase)
+    return HateSpeechController(detect_usecase, analyze_usecase, job_manager)
 
 # Endpoints
 @router.post("/detect", response_model=HateSpeechDetectionResponse)
@@ -65,4 +120,40 @@ async def analyze_hate_speech(
     try:
         return await controller.analyze_hate_speech(request)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/jobs", response_model=HateSpeechJobResponse, status_code=202)
+async def submit_hate_speech_job(
+    request: HateSpeechJobRequest,
+    controller: HateSpeechController = Depends(get_controller)
+):
+    """
+    Enfileira uma análise assíncrona (prioridade de lote)
+    
+    - **text**: Texto a ser analisado (1-5000 caracteres)
+    - **kind**: "detect" ou "analyze"
+    - **callback_url**: URL local opcional chamada quando o job terminar
+    
+    Retorna o **job_id** para consulta em `GET /jobs/{job_id}`
+    """
+    try:
+        return await controller.submit_job(request)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except JobLimitExceeded as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/jobs/{job_id}", response_model=HateSpeechJobResponse)
+async def get_hate_speech_job(
+    job_id: str,
+    controller: HateSpeechController = Depends(get_controller)
+):
+    """
+    Consulta o estado e o resultado de um job
+    """
+    job = await controller.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+    return job
\ No newline at end of file
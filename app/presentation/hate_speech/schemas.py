@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import List, Literal, Optional
 from datetime import datetime
 
 class HateSpeechRequest(BaseModel):
@@ -16,6 +16,8 @@ class HateSpeechDetectionResponse(BaseModel):
     message: Optional[str] = None
     error: Optional[str] = None
     text_length: Optional[int] = None
+    fallback_triggered: bool = False
+    verdict_reused: bool = False
 
 class ClassificationDetail(BaseModel):
     category: str
@@ -36,4 +38,30 @@ class HateSpeechAnalysisDetail(BaseModel):
     analysis_timestamp: str
     model_version: str
     fallback_triggered: bool
-    error_message: Optional[str] = None
\ No newline at end of file
+    error_message: Optional[str] = None
+    verdict_reused: bool = False
+
+class HateSpeechJobRequest(BaseModel):
+    text: str = Field(
+        ..., 
+        min_length=1, 
+        max_length=5000, 
+        description="Texto para análise de hate speech"
+    )
+    kind: Literal["detect", "analyze"] = Field(
+        "analyze",
+        description="Tipo de análise executada pelo job"
+    )
+    callback_url: Optional[str] = Field(
+        None,
+        description="URL http(s) local chamada (POST) quando o job terminar; redirecionamentos não são seguidos"
+    )
+
+class HateSpeechJobResponse(BaseModel):
+    job_id: str
+    kind: str
+    status: str
+    created_at: str
+    finished_at: Optional[str] = None
+    result: Optional[dict] = None
+    error: Optional[str] = None
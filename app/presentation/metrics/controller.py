@@ -0,0 +1,5 @@
+from app.infrastructure.metrics import metrics
+from .schemas import MetricsResponse
+
+def get_metrics() -> MetricsResponse:
+    return MetricsResponse(**metrics.snapshot())
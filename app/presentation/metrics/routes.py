@@ -0,0 +1,12 @@
+from fastapi import APIRouter
+from .controller import get_metrics
+from .schemas import MetricsResponse
+
+router = APIRouter()
+
+@router.get("/metrics", response_model=MetricsResponse)
+def metrics_endpoint():
+    """
+    Retorna as métricas internas do serviço (contadores e gauges)
+    """
+    return get_metrics()
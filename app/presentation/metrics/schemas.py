@@ -0,0 +1,6 @@
+from pydantic import BaseModel
+from typing import Dict
+
+class MetricsResponse(BaseModel):
+    counters: Dict[str, float]
+    gauges: Dict[str, float]
@@ -1,8 +1,18 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from app.presentation.age_classification.routes import router as age_classification_router
 from app.presentation.hate_speech.routes import router as hate_speech_router
+from app.presentation.metrics.routes import router as metrics_router
+from app.infrastructure.rules_config import rules_store
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Regras (labels, palavras-chave, thresholds) recarregadas sem reiniciar
+    rules_store.start_watching()
+    yield
+
+app = FastAPI(lifespan=lifespan)
 
 app.include_router(age_classification_router, prefix="/ia", tags=["Age Rating"])
 app.include_router(hate_speech_router, prefix="/ia", tags=["Hate Speech Detection"])
+app.include_router(metrics_router, prefix="/ia", tags=["Metrics"])